@@ -1,6 +1,7 @@
 """The PPPP IP Camera integration."""
 
 import select
+import aiopppp
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP,
@@ -11,7 +12,12 @@ from homeassistant.const import (
     CONF_DISCOVERY,
     CONF_ENABLED,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import config_validation as cv
 import voluptuous as vol
@@ -22,16 +28,48 @@ from .config_helpers import get_config
 from .const import (
     DOMAIN,
     LOGGER,
-    PLATFORMS,
     CONF_DEFAULTS,
     CONF_IP,
     CONF_DURATION,
     CONF_INTERVAL,
+    CONF_PARALLEL,
+    CONF_TTL,
+    CONF_MAX_INTERVAL,
+    CONF_SWEEP,
+    CONF_SWEEP_RATE,
+    CONF_SWEEP_IN_FLIGHT,
     CONF_LAMP,
+    CONF_VIDEO,
+    CONF_SNAPSHOT_MAX_AGE,
+    CONF_LINGER,
+    CONF_VIEWER_BUFFER,
+    CONF_RESTREAM,
+    CONF_PREROLL,
+    CONF_PREROLL_SIZE,
+    CONF_MOTION,
+    CONF_THRESHOLD,
+    CONF_SENSITIVITY,
+    CONF_OFF_DELAY,
+    CONF_MASK,
+    CONF_CORRUPT_FRAMES,
+    CORRUPT_DROP,
+    CORRUPT_REPEAT,
+    CONF_CONNECTION,
+    CONF_IDLE_TIMEOUT,
+    CONF_KEEPALIVE_INTERVAL,
+    CONF_PROBE_TIMEOUT,
+    CONF_MAX_BACKOFF,
+    CONF_STARTUP_CONCURRENCY,
+    CONF_STARTUP_DEADLINE,
+    CONF_DEBUG,
+    CONF_INSTRUMENTATION,
+    SERVICE_GET_TIMINGS,
+    ATTR_RESET,
 )
 
 
-from .device import PPPPDevice
+from .device import PPPPDevice, get_store
+from .warmup import get_warmup_scheduler
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -55,7 +93,68 @@ CONFIG_SCHEMA = vol.Schema(
                         vol.Optional(CONF_ENABLED, default=True): cv.boolean,
                         vol.Optional(CONF_DURATION, default=10): cv.positive_int,
                         vol.Optional(CONF_INTERVAL, default=600): cv.positive_int,
+                        vol.Optional(CONF_MAX_INTERVAL, default=21600): cv.positive_int,
+                        vol.Optional(CONF_PARALLEL, default=16): vol.All(
+                            vol.Coerce(int), vol.Range(min=1)
+                        ),
+                        vol.Optional(CONF_TTL, default=604800): cv.positive_int,
                         vol.Optional(CONF_IP): vol.Any(cv.string, [cv.string]),
+                        vol.Optional(CONF_SWEEP): vol.Any(cv.string, [cv.string]),
+                        vol.Optional(CONF_SWEEP_RATE, default=500): cv.positive_float,
+                        vol.Optional(CONF_SWEEP_IN_FLIGHT, default=512): vol.All(
+                            vol.Coerce(int), vol.Range(min=1)
+                        ),
+                    }
+                ),
+                vol.Optional(CONF_CONNECTION, default={}): vol.Schema(
+                    {
+                        vol.Optional(CONF_IDLE_TIMEOUT, default=30): cv.positive_float,
+                        vol.Optional(CONF_KEEPALIVE_INTERVAL, default=60): cv.positive_float,
+                        vol.Optional(CONF_PROBE_TIMEOUT, default=5): cv.positive_float,
+                        vol.Optional(CONF_MAX_BACKOFF, default=300): cv.positive_float,
+                        vol.Optional(CONF_STARTUP_CONCURRENCY, default=4): vol.All(
+                            vol.Coerce(int), vol.Range(min=1)
+                        ),
+                        vol.Optional(CONF_STARTUP_DEADLINE, default=30): cv.positive_float,
+                    }
+                ),
+                vol.Optional(CONF_VIDEO, default={}): vol.Schema(
+                    {
+                        vol.Optional(CONF_SNAPSHOT_MAX_AGE, default=5): cv.positive_float,
+                        vol.Optional(CONF_LINGER, default=10): cv.positive_float,
+                        vol.Optional(CONF_VIEWER_BUFFER, default=2): vol.All(
+                            vol.Coerce(int), vol.Range(min=1)
+                        ),
+                        vol.Optional(CONF_RESTREAM, default=False): cv.boolean,
+                        vol.Optional(CONF_PREROLL, default=0): cv.positive_float,
+                        vol.Optional(CONF_PREROLL_SIZE, default=32): cv.positive_int,
+                        vol.Optional(CONF_CORRUPT_FRAMES, default=CORRUPT_DROP): vol.In(
+                            [CORRUPT_DROP, CORRUPT_REPEAT]
+                        ),
+                    }
+                ),
+                vol.Optional(CONF_MOTION, default={}): vol.Schema(
+                    {
+                        vol.Optional(CONF_ENABLED, default=False): cv.boolean,
+                        vol.Optional(CONF_INTERVAL, default=1): cv.positive_float,
+                        vol.Optional(CONF_THRESHOLD, default=25): vol.All(
+                            vol.Coerce(int), vol.Range(min=1, max=255)
+                        ),
+                        vol.Optional(CONF_SENSITIVITY, default=0.02): vol.All(
+                            vol.Coerce(float), vol.Range(min=0, max=1)
+                        ),
+                        vol.Optional(CONF_OFF_DELAY, default=10): cv.positive_float,
+                        vol.Optional(CONF_MASK, default=[]): [
+                            vol.All(
+                                [vol.All(vol.Coerce(float), vol.Range(min=0, max=1))],
+                                vol.Length(min=4, max=4),
+                            )
+                        ],
+                    }
+                ),
+                vol.Optional(CONF_DEBUG, default={}): vol.Schema(
+                    {
+                        vol.Optional(CONF_INSTRUMENTATION, default=False): cv.boolean,
                     }
                 ),
             }
@@ -76,6 +175,9 @@ pppp_camera:
         enabled: true
         duration: 10    # seconds to listen for devices during each discovery
         interval: 600   # seconds between discovery attempts
+        max_interval: 21600  # longest delay while nothing new is found
+        parallel: 16    # addresses listened on at the same time
+        ttl: 604800     # seconds until an unseen device is forgotten
         ip:             # list of IPs to limit discovery to
             - 192.168.1.1
             - 192.168.1.2
@@ -83,6 +185,35 @@ pppp_camera:
         # or single IP can also be specified (usually broadcast address)
         ip: 192.168.1.255
         # if 'ip' is not specified, discovery will listen on all interfaces
+        sweep:          # networks to probe host by host where broadcast is blocked
+            - 192.168.8.0/22
+        sweep_rate: 500       # hosts probed per second
+        sweep_in_flight: 512  # hosts waiting for an answer at a time
+    connection:
+        idle_timeout: 30        # seconds to keep an unused P2P session open
+        keepalive_interval: 60  # seconds between availability probes
+        probe_timeout: 5        # seconds to wait for a probe answer
+        max_backoff: 300        # longest delay between probes of an unavailable camera
+        startup_concurrency: 4  # cameras making their first connection at once
+        startup_deadline: 30    # seconds a first connection may take
+    video:
+        snapshot_max_age: 5     # seconds a cached frame is served as a snapshot
+        linger: 10              # seconds to keep video running after the last viewer
+        viewer_buffer: 2        # newest frames kept per viewer, older ones are dropped
+        restream: false         # encode to H.264 with ffmpeg for HA's stream component
+        preroll: 0              # seconds of video kept in memory for save_clip, 0 disables
+        preroll_size: 32        # memory limit of the pre-roll buffer in MiB
+        corrupt_frames: drop    # one of [drop, repeat] (repeat the last good frame)
+    motion:
+        enabled: false          # add a motion binary_sensor computed from the video
+        interval: 1             # seconds between analysed frames
+        threshold: 25           # luma difference for a pixel to count as changed
+        sensitivity: 0.02       # fraction of changed pixels that counts as motion
+        off_delay: 10           # seconds without motion before the sensor turns off
+        mask:                   # areas to ignore as [x1, y1, x2, y2], relative to the frame
+            - [0, 0, 1, 0.1]
+    debug:
+        instrumentation: false  # collect latency histograms, see pppp_camera.get_timings
 """
 
 
@@ -94,9 +225,34 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     cfg = config if DOMAIN in config else CONFIG_SCHEMA({DOMAIN: {}})
     hass.data[DOMAIN]["config"] = cfg[DOMAIN]
     LOGGER.debug("Config: %s", get_config(hass))
+    get_warmup_scheduler(hass)
 
     await async_start_discovery(hass)
 
+    async def async_get_timings(call: ServiceCall) -> ServiceResponse:
+        """Return the latency histograms of all cameras."""
+        devices = [
+            device
+            for device in hass.data[DOMAIN].values()
+            if isinstance(device, PPPPDevice)
+        ]
+        response = {
+            device.config_entry.unique_id: device.instrumentation.as_dict()
+            for device in devices
+        }
+        if call.data[ATTR_RESET]:
+            for device in devices:
+                device.instrumentation.reset()
+        return response
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TIMINGS,
+        async_get_timings,
+        schema=vol.Schema({vol.Optional(ATTR_RESET, default=False): cv.boolean}),
+        supports_response=SupportsResponse.ONLY,
+    )
+
     return True
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
@@ -107,8 +263,8 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     device = PPPPDevice(hass, config_entry)
     try:
         await device.async_setup()
-    except TimeoutError as err:
-        await device.device.close()
+    except (TimeoutError, aiopppp.NotConnectedError) as err:
+        await device.connection.async_close()
         raise ConfigEntryNotReady(
             f"Could not connect to camera {device.device.ip_address}: {err}"
         ) from err
@@ -117,15 +273,15 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
     device.platforms = [
         Platform.CAMERA,
+        Platform.BINARY_SENSOR,
         Platform.BUTTON,
         Platform.LIGHT,
+        Platform.SENSOR,
         Platform.SWITCH,
     ]
 
     await hass.config_entries.async_forward_entry_setups(config_entry, device.platforms)
 
-    # Reload entry when its updated.
-    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
     config_entry.async_on_unload(
         hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, device.async_stop)
     )
@@ -134,9 +290,11 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    device: PPPPDevice = hass.data[DOMAIN][entry.unique_id]
+    return await hass.config_entries.async_unload_platforms(entry, device.platforms)
+
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored properties of a removed config entry."""
+    await get_store(hass, entry.entry_id).async_remove()
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload the config entry when it changed."""
-    await hass.config_entries.async_reload(entry.entry_id)
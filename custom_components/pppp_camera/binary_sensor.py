@@ -0,0 +1,118 @@
+"""PPPP motion binary sensor computed from the video stream."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ENABLED
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+
+from .config_helpers import get_motion_config
+from .const import (
+    CONF_INTERVAL,
+    CONF_MASK,
+    CONF_OFF_DELAY,
+    CONF_SENSITIVITY,
+    CONF_THRESHOLD,
+    DOMAIN,
+)
+from .device import PPPPDevice
+from .entity import PPPPBaseEntity
+from .motion import MotionDetector
+
+RESTART_DELAY = 5
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up a PPPP binary sensor platform."""
+    device = hass.data[DOMAIN][config_entry.unique_id]
+
+    if get_motion_config(hass).get(CONF_ENABLED, False):
+        async_add_entities([PPPPMotionSensor(device)])
+
+
+class PPPPMotionSensor(PPPPBaseEntity, BinarySensorEntity):
+    """Detects motion by comparing frames of the shared video stream."""
+
+    _attr_has_entity_name = True
+    _attr_device_class = BinarySensorDeviceClass.MOTION
+    _attr_is_on = False
+
+    def __init__(self, device: PPPPDevice) -> None:
+        """Initialize the motion sensor."""
+        super().__init__(device)
+
+        self._attr_unique_id = f"{self.device.dev_id}_motion"
+        config = get_motion_config(device.hass)
+        self._interval: float = config.get(CONF_INTERVAL, 1)
+        self._sensitivity: float = config.get(CONF_SENSITIVITY, 0.02)
+        self._off_delay: float = config.get(CONF_OFF_DELAY, 10)
+        self._detector = MotionDetector(
+            config.get(CONF_THRESHOLD, 25), config.get(CONF_MASK)
+        )
+        self._cancel_off: Callable[[], None] | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Start analysing frames."""
+        await super().async_added_to_hass()
+        task = self.hass.async_create_background_task(
+            self._async_watch(), f"pppp_camera {self.device.dev_id} motion"
+        )
+        self.async_on_remove(task.cancel)
+        self.async_on_remove(self._async_cancel_off)
+
+    async def _async_watch(self) -> None:
+        """Analyse at most one frame per interval, skipping the rest."""
+        while True:
+            async with self.device.frames.subscribe("motion", 1) as frames:
+                last_analysis = 0.0
+                async for frame in frames:
+                    if frame.timestamp - last_analysis < self._interval:
+                        continue
+                    last_analysis = frame.timestamp
+                    level = await self.hass.async_add_executor_job(
+                        self._detector.process, frame.data
+                    )
+                    self._async_update(level)
+            await asyncio.sleep(RESTART_DELAY)
+
+    def _async_update(self, level: float) -> None:
+        """Update the state from the latest motion level.
+
+        Motion turns the sensor on and restarts the off delay, which runs on
+        a timer, so the sensor also turns off when frames stop arriving.
+        """
+        if level < self._sensitivity:
+            return
+        self._async_cancel_off()
+        self._cancel_off = async_call_later(
+            self.hass, self._off_delay, self._async_turn_off
+        )
+        if not self._attr_is_on:
+            self._attr_is_on = True
+            self.async_write_ha_state()
+
+    @callback
+    def _async_turn_off(self, _now: datetime) -> None:
+        self._cancel_off = None
+        self._attr_is_on = False
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_off(self) -> None:
+        if self._cancel_off is not None:
+            self._cancel_off()
+            self._cancel_off = None
@@ -13,7 +13,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .const import DOMAIN, CONF_LAMP
 from .device import PPPPDevice
 from .entity import PPPPBaseEntity
-from .config_helpers import get_config, get_platform_config
+from .config_helpers import get_config
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -33,7 +33,7 @@ BUTTONS: tuple[PPPPButtonEntityDescription, ...] = (
         translation_key="reboot",
         press_fn=lambda device: device.async_reboot,
         press_data=None,
-        supported_fn=lambda device, _: bool(device.device.properties.get("auth", False)),
+        supported_fn=lambda device, _: bool(device.info.get("auth", False)),
         device_class = ButtonDeviceClass.RESTART,
         entity_category = EntityCategory.CONFIG,
     ),
@@ -42,7 +42,7 @@ BUTTONS: tuple[PPPPButtonEntityDescription, ...] = (
         translation_key="white_lamp",
         press_fn=lambda device: device.async_white_light_toggle,
         press_data=None,
-        supported_fn=lambda device, hass: CONF_LAMP in device.device.properties and get_platform_config(hass)[CONF_LAMP] == Platform.BUTTON,
+        supported_fn=lambda device, hass: CONF_LAMP in device.info and device.lamp_platform == Platform.BUTTON,
         icon="mdi:lightbulb"
     ),
     PPPPButtonEntityDescription(
@@ -50,7 +50,7 @@ BUTTONS: tuple[PPPPButtonEntityDescription, ...] = (
         translation_key="ir_lamp",
         press_fn=lambda device: device.async_ir_light_toggle,
         press_data=None,
-        supported_fn=lambda device, hass: CONF_LAMP in device.device.properties and get_platform_config(hass)[CONF_LAMP] == Platform.BUTTON,
+        supported_fn=lambda device, hass: CONF_LAMP in device.info and device.lamp_platform == Platform.BUTTON,
         icon="mdi:lightbulb-night"
     ),
 )
@@ -2,18 +2,24 @@
 
 from __future__ import annotations
 
-import asyncio
 from functools import cached_property
+import time
 
-import aiopppp
 import voluptuous as vol
 from aiohttp import web
-from homeassistant.components.camera import Camera, CameraEntityDescription
+from homeassistant.components.camera import (
+    Camera,
+    CameraEntityDescription,
+    CameraEntityFeature,
+)
+from homeassistant.components.stream import Stream
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_ENTITY_ID
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_platform
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.util import uuid
+from homeassistant.helpers.template import Template
 
 from .const import (
     ATTR_PAN,
@@ -34,9 +40,17 @@ from .const import (
     # ATTR_CONTINUOUS_DURATION,
     # ATTR_PRESET,
     SERVICE_REBOOT,
+    SERVICE_SAVE_CLIP,
+    ATTR_FILENAME,
+    ATTR_DURATION,
+    ATTR_LOOKBACK,
+    CONF_MAX_FPS,
+    CONF_ADAPTIVE_FPS,
 )
 from .device import PPPPDevice
 from .entity import PPPPBaseEntity
+from .frames import VIEWER_PREFIX
+from .mjpeg import FrameRateLimiter, MjpegStreamWriter
 
 TIMEOUT = 30
 # BUFFER_SIZE = 102400
@@ -79,6 +93,15 @@ async def async_setup_entry(
         None,
         "async_perform_reboot",
     )
+    platform.async_register_entity_service(
+        SERVICE_SAVE_CLIP,
+        {
+            vol.Required(ATTR_FILENAME): cv.template,
+            vol.Optional(ATTR_DURATION, default=10): cv.positive_float,
+            vol.Optional(ATTR_LOOKBACK): cv.positive_float,
+        },
+        "async_save_clip",
+    )
 
     async_add_entities([PPPPCamera(device)])
 
@@ -116,73 +139,78 @@ class PPPPCamera(PPPPBaseEntity, Camera):
 
         #self._attr_name = self.device.dev_id
         self._attr_unique_id = f'{self.device.dev_id}_camera'
+        if self.device.restream is not None:
+            self._attr_supported_features = CameraEntityFeature.STREAM
 
     @cached_property
     def use_stream_for_stills(self) -> bool:
         """Whether to use stream to generate stills."""
         return False
 
-    # async def stream_source(self) -> str:
-    #     """Return the stream source."""
-    #
-    #     return None  # must be None as it doesn't expose any urls
+    async def stream_source(self) -> str | None:
+        """Return the restreamed H.264 source, if restreaming is enabled."""
+        if self.device.restream is None:
+            return None
+        return await self.device.restream.async_get_source()
+
+    async def async_create_stream(self) -> Stream | None:
+        """Create the stream, restarting the restream if it stopped."""
+        restream = self.device.restream
+        if restream is not None and self.stream is not None:
+            # The stream source is only asked for once, so a restream that
+            # stopped while nobody watched is started again here.
+            await restream.async_get_source()
+        stream = await super().async_create_stream()
+        if restream is not None:
+            restream.stream = stream
+        return stream
 
     async def async_camera_image(
         self, width: int | None = None, height: int | None = None
     ) -> bytes | None:
         """Return a still image response from the camera."""
-        LOGGER.info('Getting camera image')
-        async with self.device.ensure_connected():
-            video_streaming = self.device.device.is_video_requested
-
-            if not video_streaming:
-                await self.device.device.start_video()
-            LOGGER.info('Getting camera image')
-            image_frame = await self.device.device.get_video_frame()
-            if not video_streaming:
-                await self.device.device.stop_video()
-        return image_frame and image_frame.data
+        LOGGER.debug('Getting camera image')
+        image_frame = await self.device.async_get_snapshot()
+        if image_frame is None:
+            return None
+        if width is None and height is None:
+            return image_frame.data
+        return await self.device.async_scale_frame(image_frame, width, height)
 
     async def handle_async_mjpeg_stream(
         self, request: web.Request
     ) -> web.StreamResponse | None:
         """Generate an HTTP MJPEG stream from the camera."""
-        async with self.device.ensure_connected():
-            LOGGER.info(f'{self.device.device.is_video_requested=}')
-            if not self.device.device.is_video_requested:
-                await self.device.device.start_video()
+        options = self.device.config_entry.options
+        max_fps = options.get(CONF_MAX_FPS) or None
+        if fps := request.query.get("fps"):
+            try:
+                max_fps = float(fps) or None
+            except ValueError:
+                LOGGER.warning('Ignoring invalid fps value: %s', fps)
+        limiter = FrameRateLimiter(max_fps, options.get(CONF_ADAPTIVE_FPS, False))
 
-            response = web.StreamResponse()
-            boundary = '--frame' + uuid.random_uuid_hex()
-            response.content_type = f'multipart/x-mixed-replace; boundary={boundary}'
-            response.content_length = 1000000000000
-            await response.prepare(request)
+        async with self.device.frames.subscribe(
+            f"{VIEWER_PREFIX}{request.remote}"
+        ) as frames:
+            writer = MjpegStreamWriter()
+            await writer.prepare(request)
 
             try:
-                while True:
-                    try:
-                        frame = await asyncio.wait_for(self.device.device.get_video_frame(), timeout=10)
-                    except asyncio.TimeoutError:
-                        LOGGER.warning('Error getting video frame: Timeout')
-                        break
-                    except aiopppp.NotConnectedError as err:
-                        LOGGER.warning('Error getting video frame: %s', err)
-                        break
-                    if not frame:
-                        LOGGER.warning('Error getting video frame: empty frame')
-                        break
-                    header = f'--{boundary}\r\n'.encode()
-                    header += b'Content-Length: %d\r\n' % len(frame.data)
-                    header += b'Content-Type: image/jpeg\r\n\r\n'
-
+                async for frame in frames:
+                    if not limiter.accept(frame.timestamp):
+                        continue
+                    started = time.monotonic()
                     try:
-                        await response.write(header)
-                        await response.write(frame.data)
+                        await writer.write_frame(frame.data)
                     except (TimeoutError, ConnectionResetError):
                         break
+                    elapsed = time.monotonic() - started
+                    limiter.record_write(elapsed)
+                    self.device.instrumentation.record("mjpeg_write", elapsed)
             finally:
                 LOGGER.info('%s camera stream closed', self.name)
-                return response
+                return writer.response
 
     async def async_perform_ptz(
         self,
@@ -196,11 +224,12 @@ class PPPPCamera(PPPPBaseEntity, Camera):
         # zoom=None,
     ) -> None:
         """Perform a PTZ action on the camera."""
-        async with self.device.ensure_connected():
-            if pan:
-                await self.device.device.session.step_rotate(pan)
-            elif tilt:
-                await self.device.device.session.step_rotate(tilt)
+        with self.device.instrumentation.timer("ptz"):
+            async with self.device.ensure_connected():
+                if pan:
+                    await self.device.device.session.step_rotate(pan)
+                elif tilt:
+                    await self.device.device.session.step_rotate(tilt)
 
         # await self.device.async_perform_ptz(
         #     self.profile,
@@ -219,3 +248,17 @@ class PPPPCamera(PPPPBaseEntity, Camera):
     ) -> None:
         """Perform a PTZ action on the camera."""
         await self.device.device.session.reboot()
+
+    async def async_save_clip(
+        self,
+        filename: Template,
+        duration: float,
+        lookback: float | None = None,
+    ) -> None:
+        """Save the pre-roll buffer plus the next seconds of video to a file."""
+        path = filename.async_render(variables={ATTR_ENTITY_ID: self.entity_id})
+        if not self.hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"Can't write {path}, no access to path!")
+
+        if not await self.device.async_save_clip(path, duration, lookback):
+            raise HomeAssistantError(f"No video received, {path} was not saved")
@@ -0,0 +1,102 @@
+"""Pre-roll buffering and clip recording for PPPP cameras."""
+
+from __future__ import annotations
+
+from collections import deque
+from fractions import Fraction
+import os
+from typing import Any
+
+from .frames import Frame
+from .jpeg import jpeg_size
+
+CLIP_TIME_BASE = Fraction(1, 1000)
+
+
+class PrerollBuffer:
+    """Keeps the most recent frames, bounded by age and total size."""
+
+    def __init__(self, seconds: float, max_bytes: int) -> None:
+        """Initialize the buffer."""
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self._frames: deque[Frame] = deque()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def append(self, frame: Frame) -> None:
+        """Add a frame and evict the ones that no longer fit."""
+        self._frames.append(frame)
+        self.size += len(frame.data)
+        frames = self._frames
+        while len(frames) > 1 and (
+            self.size > self.max_bytes
+            or frame.timestamp - frames[0].timestamp > self.seconds
+        ):
+            self.size -= len(frames.popleft().data)
+
+    def frames(self, lookback: float | None = None) -> list[Frame]:
+        """Return the buffered frames, optionally limited to the last seconds."""
+        if lookback is None or not self._frames:
+            return list(self._frames)
+        start = self._frames[-1].timestamp - lookback
+        return [frame for frame in self._frames if frame.timestamp >= start]
+
+
+class ClipWriter:
+    """Muxes JPEG frames into a Matroska file without re-encoding them.
+
+    Every method blocks on disk I/O and must be run in the executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the writer."""
+        self.path = path
+        self._container: Any = None
+        self._stream: Any = None
+        self._start: float = 0
+        self._last_pts = -1
+        self.frames = 0
+
+    def write(self, frames: list[Frame]) -> None:
+        """Append a batch of frames to the clip."""
+        import av  # pylint: disable=import-outside-toplevel
+
+        if not frames:
+            return
+        if self._container is None:
+            self._open(frames[0])
+
+        for frame in frames:
+            pts = round((frame.timestamp - self._start) / CLIP_TIME_BASE)
+            if pts <= self._last_pts:
+                continue
+            packet = av.Packet(frame.data)
+            packet.stream = self._stream
+            packet.time_base = CLIP_TIME_BASE
+            packet.pts = packet.dts = self._last_pts = pts
+            packet.is_keyframe = True
+            self._container.mux(packet)
+            self.frames += 1
+
+    def close(self) -> None:
+        """Finalize the clip."""
+        if self._container is not None:
+            self._container.close()
+            self._container = None
+
+    def _open(self, first: Frame) -> None:
+        """Create the output file using the first frame's dimensions."""
+        import av  # pylint: disable=import-outside-toplevel
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        width, height = jpeg_size(first.data)
+        self._container = av.open(self.path, "w", format="matroska")
+        self._stream = self._container.add_stream("mjpeg")
+        self._stream.width = width
+        self._stream.height = height
+        self._stream.pix_fmt = "yuvj420p"
+        self._stream.time_base = CLIP_TIME_BASE
+        self._start = first.timestamp
@@ -0,0 +1,136 @@
+"""Command queue for PPPP cameras."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Hashable
+
+if TYPE_CHECKING:
+    from .device import PPPPDevice
+
+
+@dataclass(slots=True)
+class _Command:
+    """A queued command and the callers waiting for it."""
+
+    run: Callable[[], Awaitable[None]]
+    waiters: list[asyncio.Future[None]] = field(default_factory=list)
+
+
+class CommandQueue:
+    """Sends commands to a device one at a time, in order.
+
+    A command queued for a target that already has a pending command replaces
+    it, so only the newest state is sent, and callers of both commands wait
+    for the newest one. Commands queued together run on one connection.
+    """
+
+    def __init__(self, device: PPPPDevice) -> None:
+        """Initialize the command queue."""
+        self._device = device
+        self._pending: OrderedDict[Hashable, _Command] = OrderedDict()
+        self._task: asyncio.Task | None = None
+        self.sent = 0
+        self.coalesced = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the queue state."""
+        return {
+            "pending": len(self._pending),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+        }
+
+    async def async_run(
+        self, target: Hashable | None, run: Callable[[], Awaitable[None]]
+    ) -> None:
+        """Queue a command and wait until it was sent.
+
+        Commands without a target, e.g. toggles, are never replaced.
+        """
+        future: asyncio.Future[None] = self._device.hass.loop.create_future()
+        key = target if target is not None else object()
+        if (command := self._pending.get(key)) is not None:
+            command.run = run
+            self.coalesced += 1
+        else:
+            command = self._pending[key] = _Command(run)
+        command.waiters.append(future)
+
+        if self._task is None:
+            self._task = self._device.hass.async_create_background_task(
+                self._async_process(), f"pppp_camera {self._device.dev_id} commands"
+            )
+        await asyncio.shield(future)
+
+    async def async_stop(self) -> None:
+        """Cancel the running command and drop the queued ones."""
+        if (task := self._task) is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        # The task may have been cancelled before it started.
+        self._task = None
+        self._cancel_pending()
+
+    async def _async_process(self) -> None:
+        """Send queued commands until the queue is empty."""
+        command: _Command | None = None
+        try:
+            async with self._device.ensure_connected():
+                while self._pending:
+                    _, command = self._pending.popitem(last=False)
+                    try:
+                        await command.run()
+                    except Exception as err:  # noqa: BLE001
+                        _resolve(command.waiters, err)
+                    else:
+                        _resolve(command.waiters)
+                    self.sent += 1
+        except asyncio.CancelledError:
+            # Unloading or shutting down, do not revive the queue.
+            self._task = None
+            if command is not None:
+                _cancel(command.waiters)
+            self._cancel_pending()
+            raise
+        except Exception as err:  # noqa: BLE001
+            while self._pending:
+                _, command = self._pending.popitem(last=False)
+                _resolve(command.waiters, err)
+
+        self._task = None
+        if self._pending:
+            # Commands were queued after the connection was released.
+            self._task = self._device.hass.async_create_background_task(
+                self._async_process(),
+                f"pppp_camera {self._device.dev_id} commands",
+            )
+
+    def _cancel_pending(self) -> None:
+        while self._pending:
+            _, command = self._pending.popitem(last=False)
+            _cancel(command.waiters)
+
+
+def _resolve(
+    waiters: list[asyncio.Future[None]], err: Exception | None = None
+) -> None:
+    """Complete the futures of callers waiting for a command."""
+    for waiter in waiters:
+        if waiter.done():
+            continue
+        if err is None:
+            waiter.set_result(None)
+        else:
+            waiter.set_exception(err)
+
+
+def _cancel(waiters: list[asyncio.Future[None]]) -> None:
+    """Cancel the futures of callers waiting for a dropped command."""
+    for waiter in waiters:
+        waiter.cancel()
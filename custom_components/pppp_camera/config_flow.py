@@ -23,14 +23,26 @@ from homeassistant.const import (
     CONF_PASSWORD,
     CONF_USERNAME,
     CONF_DEVICE_ID,
+    Platform,
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.typing import DiscoveryInfoType
 from homeassistant.helpers import selector
 
-from .const import DOMAIN, LOGGER, SOURCE_DISCOVERY_CONFIRM
-from .config_helpers import get_defaults
+from .const import (
+    CONF_ADAPTIVE_FPS,
+    CONF_LAMP,
+    CONF_MAX_FPS,
+    CONF_TIMELAPSE_INTERVAL,
+    CONF_TIMELAPSE_MAX_SIZE,
+    CONF_TIMELAPSE_RETENTION,
+    DOMAIN,
+    LOGGER,
+    SOURCE_DISCOVERY_CONFIRM,
+)
+from .config_helpers import get_defaults, get_lamp_platform
+from .discovery import async_request_discovery
 
 
 @callback
@@ -78,13 +90,13 @@ class PPPPCameraFlowHandler(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
-    # @staticmethod
-    # @callback
-    # def async_get_options_flow(
-    #     config_entry: ConfigEntry,
-    # ) -> OptionsFlow:
-    #     """Get the options flow for this handler."""
-    #     return PPPPCameraOptionsFlowHandler()
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: ConfigEntry,
+    ) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return PPPPCameraOptionsFlowHandler()
 
     async def async_step_integration_discovery(
         self, discovery_info: DiscoveryInfoType
@@ -94,9 +106,10 @@ class PPPPCameraFlowHandler(ConfigFlow, domain=DOMAIN):
         device_id = discovery_info[CONF_DEVICE_ID]
         name = f"{device_id} ({host})"
 
-        # Check if already configured
+        # Check if already configured. Discovery moves configured cameras
+        # to their new host itself, without reloading the entry.
         await self.async_set_unique_id(device_id)
-        self._abort_if_unique_id_configured(updates={CONF_HOST: host})
+        self._abort_if_unique_id_configured()
 
         # Check if host is already configured with different device ID
         self._async_abort_entries_match({CONF_HOST: host})
@@ -199,6 +212,8 @@ class PPPPCameraFlowHandler(ConfigFlow, domain=DOMAIN):
                     },
                 )
         else:
+            # Look for cameras while the user fills in the form.
+            async_request_discovery(self.hass, "camera is being added")
             user_input = {
                 CONF_USERNAME: default_username,
                 CONF_PASSWORD: default_password,
@@ -227,14 +242,18 @@ class PPPPCameraFlowHandler(ConfigFlow, domain=DOMAIN):
                 await self.async_set_unique_id(dev_id, raise_on_progress=False)
                 self._abort_if_unique_id_mismatch()
 
-                return self.async_update_reload_and_abort(
-                    self._get_reconfigure_entry(),
+                # The entry applies host and credential changes without a reload.
+                entry = self._get_reconfigure_entry()
+                self.hass.config_entries.async_update_entry(
+                    entry,
                     options={
+                        **entry.options,
                         CONF_HOST: user_input[CONF_HOST],
                         CONF_USERNAME: user_input.get(CONF_USERNAME, default_username),
                         CONF_PASSWORD: user_input.get(CONF_PASSWORD, default_password),
                     },
                 )
+                return self.async_abort(reason="reconfigure_successful")
         else:
             user_input = {
                     CONF_HOST: self._get_reconfigure_entry().options[CONF_HOST],
@@ -253,47 +272,78 @@ class PPPPCameraFlowHandler(ConfigFlow, domain=DOMAIN):
         )
 
 
-# class PPPPCameraOptionsFlowHandler(OptionsFlow):
-#     """Handle PPPP Camera options."""
-
-#     async def async_step_init(
-#         self, user_input: dict[str, Any] | None = None
-#     ) -> ConfigFlowResult:
-#         """Manage PPPP Camera options."""
-#         errors: dict[str, str] = {}
-
-#        # Get defaults for username/password
-#        defaults = get_defaults(self.hass)
-#        default_username = defaults.get(CONF_USERNAME)
-#        default_password = defaults.get(CONF_PASSWORD)
-
-#         if user_input is not None:
-#             errors, dev_id = await async_validate_input(self.hass, user_input)
-#             if not errors:
-#                 for entry in self.hass.config_entries.async_entries(DOMAIN):
-#                     if (
-#                         entry.entry_id != self.config_entry.entry_id
-#                         and entry.options[CONF_HOST] == user_input[CONF_HOST]
-#                     ):
-#                         errors = {CONF_HOST: "already_configured"}
-
-#                 if not errors:
-#                     return self.async_create_entry(
-#                         title=dev_id,
-#                         data={
-#                             CONF_HOST: user_input[CONF_HOST],
-#                             CONF_USERNAME: user_input.get(CONF_USERNAME, default_username),
-#                             CONF_PASSWORD: user_input.get(CONF_PASSWORD, default_password),
-#                         },
-#                     )
-#         else:
-#             user_input = {}
-
-#         return self.async_show_form(
-#             step_id="init",
-#             data_schema=async_get_schema(user_input or self.config_entry.options),
-#             errors=errors,
-#         )
+class PPPPCameraOptionsFlowHandler(OptionsFlow):
+    """Handle PPPP Camera options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage PPPP Camera stream options."""
+        if user_input is not None:
+            return self.async_create_entry(
+                data={**self.config_entry.options, **user_input}
+            )
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_LAMP,
+                        default=get_lamp_platform(self.hass, options),
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[Platform.SWITCH, Platform.LIGHT, Platform.BUTTON],
+                            translation_key=CONF_LAMP,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_MAX_FPS, default=options.get(CONF_MAX_FPS, 0)
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0, max=30, step=0.5, mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_ADAPTIVE_FPS, default=options.get(CONF_ADAPTIVE_FPS, False)
+                    ): bool,
+                    vol.Optional(
+                        CONF_TIMELAPSE_INTERVAL,
+                        default=options.get(CONF_TIMELAPSE_INTERVAL, 0),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0,
+                            max=86400,
+                            unit_of_measurement="s",
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_TIMELAPSE_RETENTION,
+                        default=options.get(CONF_TIMELAPSE_RETENTION, 30),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1,
+                            max=3650,
+                            unit_of_measurement="d",
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_TIMELAPSE_MAX_SIZE,
+                        default=options.get(CONF_TIMELAPSE_MAX_SIZE, 1024),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1,
+                            max=1048576,
+                            unit_of_measurement="MB",
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    ),
+                }
+            ),
+        )
 
 
 class InvalidAuth(HomeAssistantError):
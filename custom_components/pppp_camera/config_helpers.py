@@ -1,25 +1,56 @@
 """Helpers for configuration handling."""
 
+from collections.abc import Mapping
 from typing import Any
 
 from homeassistant.core import HomeAssistant
-from homeassistant.const import CONF_DISCOVERY, CONF_PLATFORM
+from homeassistant.const import CONF_DISCOVERY, CONF_PLATFORM, Platform
 
-from .const import CONF_DEFAULTS, DOMAIN
+from .const import (
+    CONF_CONNECTION,
+    CONF_DEBUG,
+    CONF_DEFAULTS,
+    CONF_LAMP,
+    CONF_MOTION,
+    CONF_VIDEO,
+    DOMAIN,
+)
 
 
 def get_config(hass: HomeAssistant) -> dict[str, Any]:
-    """Get configuration for DOMAIN."""
+    """Get the YAML configuration of the integration."""
     return hass.data.get(DOMAIN, {}).get("config", {})
 
 def get_defaults(hass: HomeAssistant) -> dict[str, Any]:
-    """Get configuration for DOMAIN."""
+    """Get the default credentials for new cameras."""
     return get_config(hass).get(CONF_DEFAULTS, {})
 
 def get_discovery_config(hass: HomeAssistant) -> dict[str, Any]:
-    """Get configuration for DOMAIN."""
+    """Get the discovery section of the YAML configuration."""
     return get_config(hass).get(CONF_DISCOVERY, {})
 
 def get_platform_config(hass: HomeAssistant) -> dict[str, Any]:
-    """Get configuration for DOMAIN."""
+    """Get the platform section of the YAML configuration."""
     return get_config(hass).get(CONF_PLATFORM, {})
+
+def get_connection_config(hass: HomeAssistant) -> dict[str, Any]:
+    """Get the P2P connection section of the YAML configuration."""
+    return get_config(hass).get(CONF_CONNECTION, {})
+
+def get_video_config(hass: HomeAssistant) -> dict[str, Any]:
+    """Get the video section of the YAML configuration."""
+    return get_config(hass).get(CONF_VIDEO, {})
+
+def get_motion_config(hass: HomeAssistant) -> dict[str, Any]:
+    """Get the motion detection section of the YAML configuration."""
+    return get_config(hass).get(CONF_MOTION, {})
+
+def get_debug_config(hass: HomeAssistant) -> dict[str, Any]:
+    """Get the debug section of the YAML configuration."""
+    return get_config(hass).get(CONF_DEBUG, {})
+
+def get_lamp_platform(hass: HomeAssistant, options: Mapping[str, Any]) -> Platform:
+    """Get the lamp platform of an entry, falling back to the YAML setting."""
+    return options.get(CONF_LAMP) or get_platform_config(hass).get(
+        CONF_LAMP, Platform.SWITCH
+    )
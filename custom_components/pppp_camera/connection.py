@@ -0,0 +1,177 @@
+"""P2P connection lifecycle for PPPP cameras."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING, Any
+
+import aiopppp
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from .device import PPPPDevice
+
+STATE_DISCONNECTED = "disconnected"
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED = "connected"
+STATE_CLOSING = "closing"
+
+# Seconds to wait for users to release the session before closing it anyway.
+CLOSE_TIMEOUT = 10
+
+
+class ConnectionManager:
+    """Shares one P2P session between all users of a device.
+
+    The session is opened by the first user and closed `idle_timeout` seconds
+    after the last one leaves, so commands that follow each other closely
+    reuse a warm session. Opening and closing happen under one lock, and an
+    idle close is skipped if a user arrived while it was waiting. Closing right
+    away, e.g. to reconnect with new settings, waits for the users holding
+    the session to release it, so a session is never closed underneath a
+    user. While the device is known to be
+    unavailable, acquiring fails right away instead of waiting for the
+    connection attempt to time out.
+    """
+
+    def __init__(self, device: PPPPDevice, idle_timeout: float) -> None:
+        """Initialize the connection manager."""
+        self._device = device
+        self._idle_timeout = idle_timeout
+        self._lock = asyncio.Lock()
+        self._state = STATE_DISCONNECTED
+        self._users = 0
+        self._holders = 0
+        self._released = asyncio.Event()
+        self._released.set()
+        self._connects = 0
+        self._close_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def state(self) -> str:
+        """Return the connection state."""
+        if self._state == STATE_CONNECTED and not self._device.device.is_connected:
+            # The device dropped the session on its own.
+            return STATE_DISCONNECTED
+        return self._state
+
+    @property
+    def users(self) -> int:
+        """Return the number of connection users."""
+        return self._users
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the connection state."""
+        return {
+            "state": self.state,
+            "users": self._users,
+            "connects": self._connects,
+            "idle_timeout": self._idle_timeout,
+            "closing": self._close_handle is not None,
+        }
+
+    @contextlib.asynccontextmanager
+    async def async_use(self) -> AsyncIterator[None]:
+        """Hold the connection open for the enclosed block."""
+        await self.async_acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def async_acquire(self) -> None:
+        """Register a user, connecting if there is no open session."""
+        self._users += 1
+        self._cancel_close()
+        try:
+            async with self._lock:
+                if not self._device.device.is_connected:
+                    await self._async_connect()
+                self._holders += 1
+                self._released.clear()
+        except BaseException:
+            self._leave()
+            raise
+
+    def release(self) -> None:
+        """Unregister a user, closing the session after the idle timeout."""
+        self._holders -= 1
+        if self._holders == 0:
+            self._released.set()
+        self._leave()
+
+    async def async_close(self) -> None:
+        """Close the session once the users holding it released it.
+
+        Users arriving in the meantime wait and connect again afterwards.
+        """
+        self._cancel_close()
+        async with self._lock:
+            try:
+                async with asyncio.timeout(CLOSE_TIMEOUT):
+                    await self._released.wait()
+            except TimeoutError:
+                LOGGER.warning(
+                    "Closing %s while %d users still hold the session",
+                    self._device.host,
+                    self._holders,
+                )
+            await self._async_close()
+
+    def _leave(self) -> None:
+        self._users -= 1
+        if self._users == 0 and self._close_handle is None:
+            self._close_handle = self._device.hass.loop.call_later(
+                self._idle_timeout, self._schedule_close
+            )
+
+    def _cancel_close(self) -> None:
+        if self._close_handle is not None:
+            self._close_handle.cancel()
+            self._close_handle = None
+
+    def _schedule_close(self) -> None:
+        self._close_handle = None
+        self._device.hass.async_create_task(self._async_close_idle())
+
+    async def _async_close_idle(self) -> None:
+        """Close the session unless a user arrived in the meantime."""
+        async with self._lock:
+            if self._users == 0:
+                await self._async_close()
+
+    async def _async_connect(self) -> None:
+        if not self._device.available:
+            raise aiopppp.NotConnectedError(f"{self._device.host} is unavailable")
+        self._state = STATE_CONNECTING
+        try:
+            async with self._device.warmup.async_slot(self._device):
+                with self._device.instrumentation.timer("connect"):
+                    await self._device.device.connect()
+        except (TimeoutError, aiopppp.NotConnectedError):
+            await self._async_close()
+            self._device.watchdog.report_failure()
+            raise
+        except BaseException:
+            self._state = STATE_DISCONNECTED
+            raise
+        self._state = STATE_CONNECTED
+        self._connects += 1
+        LOGGER.debug("Connected to %s", self._device.host)
+
+    async def _async_close(self) -> None:
+        if not self._device.device.is_connected:
+            self._state = STATE_DISCONNECTED
+            return
+        self._state = STATE_CLOSING
+        try:
+            with self._device.instrumentation.timer("close"):
+                await self._device.device.close()
+        except Exception as err:  # noqa: BLE001
+            LOGGER.debug("Error closing %s: %s", self._device.host, err)
+        finally:
+            self._state = STATE_DISCONNECTED
+        LOGGER.debug("Disconnected from %s", self._device.host)
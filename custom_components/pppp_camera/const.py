@@ -13,6 +13,11 @@ ATTR_TILT = "tilt"
 ATTR_MOVE_MODE = "move_mode"
 ATTR_CONTINUOUS_DURATION = "continuous_duration"
 ATTR_PRESET = "preset"
+ATTR_FILENAME = "filename"
+ATTR_DURATION = "duration"
+ATTR_LOOKBACK = "lookback"
+ATTR_LAST_SEEN = "last_seen"
+ATTR_RESET = "reset"
 
 CONTINUOUS_MOVE = "ContinuousMove"
 RELATIVE_MOVE = "RelativeMove"
@@ -27,6 +32,8 @@ DIR_RIGHT = "RIGHT"
 
 SERVICE_PTZ = "ptz"
 SERVICE_REBOOT = "reboot"
+SERVICE_SAVE_CLIP = "save_clip"
+SERVICE_GET_TIMINGS = "get_timings"
 
 SOURCE_DISCOVERY_CONFIRM = "discovery_confirm"
 
@@ -34,4 +41,50 @@ CONF_DEFAULTS = "defaults"
 CONF_IP = "ip"
 CONF_DURATION = "duration"
 CONF_INTERVAL = "interval"
+CONF_PARALLEL = "parallel"
+CONF_TTL = "ttl"
+CONF_MAX_INTERVAL = "max_interval"
+CONF_SWEEP = "sweep"
+CONF_SWEEP_RATE = "sweep_rate"
+CONF_SWEEP_IN_FLIGHT = "sweep_in_flight"
 CONF_LAMP = "lamp"
+CONF_CONNECTION = "connection"
+CONF_IDLE_TIMEOUT = "idle_timeout"
+CONF_KEEPALIVE_INTERVAL = "keepalive_interval"
+CONF_PROBE_TIMEOUT = "probe_timeout"
+CONF_MAX_BACKOFF = "max_backoff"
+CONF_STARTUP_CONCURRENCY = "startup_concurrency"
+CONF_STARTUP_DEADLINE = "startup_deadline"
+CONF_VIDEO = "video"
+CONF_SNAPSHOT_MAX_AGE = "snapshot_max_age"
+CONF_LINGER = "linger"
+CONF_VIEWER_BUFFER = "viewer_buffer"
+CONF_RESTREAM = "restream"
+CONF_PREROLL = "preroll"
+CONF_PREROLL_SIZE = "preroll_size"
+CONF_MOTION = "motion"
+CONF_THRESHOLD = "threshold"
+CONF_SENSITIVITY = "sensitivity"
+CONF_OFF_DELAY = "off_delay"
+CONF_MASK = "mask"
+CONF_MAX_FPS = "max_fps"
+CONF_ADAPTIVE_FPS = "adaptive_fps"
+CONF_TIMELAPSE_INTERVAL = "timelapse_interval"
+CONF_TIMELAPSE_RETENTION = "timelapse_retention"
+CONF_TIMELAPSE_MAX_SIZE = "timelapse_max_size"
+CONF_CORRUPT_FRAMES = "corrupt_frames"
+CORRUPT_DROP = "drop"
+CORRUPT_REPEAT = "repeat"
+CONF_DEBUG = "debug"
+CONF_INSTRUMENTATION = "instrumentation"
+
+SIGNAL_AVAILABILITY = f"{DOMAIN}_availability_{{}}"
+SIGNAL_DISCOVERY_REQUEST = f"{DOMAIN}_discovery_request"
+
+DATA_WARMUP = "warmup"
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.{{}}"
+STORAGE_PROPERTIES = "properties"
+STORAGE_DEVICES = "devices"
+DISCOVERY_STORAGE_KEY = f"{DOMAIN}.discovery"
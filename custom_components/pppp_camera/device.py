@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import time
 
 import aiopppp
 from homeassistant.config_entries import ConfigEntry
@@ -14,6 +15,54 @@ from homeassistant.const import (
     Platform,
 )
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
+
+from .clip import ClipWriter, PrerollBuffer
+from .commands import CommandQueue
+from .config_helpers import (
+    get_connection_config,
+    get_debug_config,
+    get_lamp_platform,
+    get_video_config,
+)
+from .connection import ConnectionManager
+from .const import (
+    CONF_CORRUPT_FRAMES,
+    CONF_IDLE_TIMEOUT,
+    CONF_INSTRUMENTATION,
+    CONF_KEEPALIVE_INTERVAL,
+    CONF_LAMP,
+    CONF_LINGER,
+    CONF_MAX_BACKOFF,
+    CONF_PREROLL,
+    CONF_PREROLL_SIZE,
+    CONF_PROBE_TIMEOUT,
+    CONF_RESTREAM,
+    CONF_SNAPSHOT_MAX_AGE,
+    CONF_TIMELAPSE_INTERVAL,
+    CONF_TIMELAPSE_MAX_SIZE,
+    CONF_TIMELAPSE_RETENTION,
+    CONF_VIEWER_BUFFER,
+    CORRUPT_REPEAT,
+    DOMAIN,
+    LOGGER,
+    STORAGE_KEY,
+    STORAGE_PROPERTIES,
+    STORAGE_VERSION,
+)
+from .frames import Frame, FrameBroadcaster
+from .instrumentation import Instrumentation
+from .jpeg import scale_jpeg
+from .restream import Restreamer
+from .timelapse import Timelapse
+from .video import VideoSession
+from .warmup import get_warmup_scheduler
+from .watchdog import Watchdog
+
+CLIP_BATCH_SIZE = 10
+PREROLL_RESTART_DELAY = 5
+PROPERTIES_RETRY_DELAY = 60
 
 
 class PPPPDevice:
@@ -25,20 +74,123 @@ class PPPPDevice:
         """Initialize the device."""
         self.hass: HomeAssistant = hass
         self.config_entry: ConfigEntry = config_entry
-        self._original_options = dict(config_entry.options)
+        self._options = dict(config_entry.options)
         self.available: bool = True
         self.info: dict = {}
+        # Set once `info` was read from the camera or the store, even if empty.
+        self._info_loaded = False
         self.platforms: list[Platform] = []
+        self.instrumentation = Instrumentation(
+            get_debug_config(hass).get(CONF_INSTRUMENTATION, False)
+        )
+        self.connection = ConnectionManager(
+            self, get_connection_config(hass).get(CONF_IDLE_TIMEOUT, 30)
+        )
+        self.commands = CommandQueue(self)
+        self.warmup = get_warmup_scheduler(hass)
+        connection_config = get_connection_config(hass)
+        self.watchdog = Watchdog(
+            self,
+            connection_config.get(CONF_KEEPALIVE_INTERVAL, 60),
+            connection_config.get(CONF_PROBE_TIMEOUT, 5),
+            connection_config.get(CONF_MAX_BACKOFF, 300),
+        )
+
+        video_config = get_video_config(hass)
+        self.frames = FrameBroadcaster(
+            self,
+            video_config.get(CONF_VIEWER_BUFFER, 2),
+            video_config.get(CONF_CORRUPT_FRAMES) == CORRUPT_REPEAT,
+        )
+        self.video = VideoSession(
+            self, video_config.get(CONF_LINGER, 10), self.frames.async_read_frames
+        )
+        self.restream: Restreamer | None = (
+            Restreamer(self, video_config.get(CONF_LINGER, 10))
+            if video_config.get(CONF_RESTREAM)
+            else None
+        )
+        self.preroll: PrerollBuffer | None = (
+            PrerollBuffer(
+                video_config[CONF_PREROLL],
+                video_config.get(CONF_PREROLL_SIZE, 32) * 1024 * 1024,
+            )
+            if video_config.get(CONF_PREROLL)
+            else None
+        )
+        self.timelapse: Timelapse | None = None
+        self._snapshot_max_age: float = video_config.get(CONF_SNAPSHOT_MAX_AGE, 5)
+        self._snapshot_task: asyncio.Task[Frame | None] | None = None
+        self._scaled_images: dict[tuple[int, int | None, int | None], asyncio.Task[bytes]] = {}
 
-        self._connected_num = 0
         self._dt_diff_seconds: float = 0
 
     async def _async_update_listener(
         self, hass: HomeAssistant, entry: ConfigEntry
     ) -> None:
-        """Handle options update."""
-        if self._original_options != entry.options:
-            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+        """Apply changed options without reloading the entry."""
+        old_options, self._options = self._options, dict(entry.options)
+        changed = {
+            key
+            for key in old_options.keys() | self._options.keys()
+            if old_options.get(key) != self._options.get(key)
+        }
+        LOGGER.debug("Options of %s changed: %s", self.host, sorted(changed))
+
+        if changed & {CONF_HOST, CONF_USERNAME, CONF_PASSWORD}:
+            await self._async_reconnect()
+        if CONF_LAMP in changed:
+            old_platform = get_lamp_platform(hass, old_options)
+            new_platform = get_lamp_platform(hass, self._options)
+            if old_platform != new_platform:
+                await hass.config_entries.async_unload_platforms(
+                    entry, [old_platform, new_platform]
+                )
+                await hass.config_entries.async_forward_entry_setups(
+                    entry, [old_platform, new_platform]
+                )
+        if changed & {
+            CONF_TIMELAPSE_INTERVAL,
+            CONF_TIMELAPSE_MAX_SIZE,
+            CONF_TIMELAPSE_RETENTION,
+        }:
+            await self._async_stop_timelapse()
+            self._start_timelapse()
+        # The frame rate options are read for each new stream.
+
+    async def _async_reconnect(self) -> None:
+        """Replace the session after the host or credentials changed."""
+        await self.video.async_stop()
+        await self.connection.async_close()
+        self.device = get_device(
+            self.hass,
+            host=self.host,
+            username=self.username,
+            password=self.password,
+        )
+        # Video consumers and the next command connect with the new settings.
+        self.watchdog.reset()
+
+    def _start_timelapse(self) -> None:
+        if interval := self._options.get(CONF_TIMELAPSE_INTERVAL):
+            self.timelapse = Timelapse(
+                self,
+                interval,
+                self._options.get(CONF_TIMELAPSE_RETENTION, 30),
+                self._options.get(CONF_TIMELAPSE_MAX_SIZE, 1024),
+                get_video_config(self.hass).get(CONF_LINGER, 10),
+            )
+            self.timelapse.start()
+
+    async def _async_stop_timelapse(self) -> None:
+        if self.timelapse is not None:
+            await self.timelapse.async_stop()
+            self.timelapse = None
+
+    @property
+    def lamp_platform(self) -> Platform:
+        """Return the platform of the lamp entities."""
+        return get_lamp_platform(self.hass, self._options)
 
     @property
     def host(self) -> str:
@@ -58,49 +210,197 @@ class PPPPDevice:
     @property
     def dev_id(self) -> str:
         """Return the dev_id of this device."""
-        return self.device.descriptor.dev_id.dev_id
-
-    async def connect(self):
-        """Connect to the device."""
-        self._connected_num += 1
-        if not self.device.is_connected:
-            await self.device.connect()
-
-    async def close(self):
-        """Close the connection to the device."""
-        if self.device._session is None or not self._connected_num:
-            self._connected_num = 0
-            return
+        return self.config_entry.unique_id
 
-        self._connected_num -= 1
-        if self._connected_num == 0:
-            await asyncio.sleep(1);
-            await self.device.close()
+    @property
+    def warmup_priority(self) -> int:
+        """Return the startup connection priority, higher connects first."""
+        return self.video.consumers
 
     async def async_setup(self) -> None:
         """Set up the device."""
         self.device = get_device(
             self.hass,
-            host=self.config_entry.options[CONF_HOST],
-            username=self.config_entry.options[CONF_USERNAME],
-            password=self.config_entry.options[CONF_PASSWORD],
+            host=self.host,
+            username=self.username,
+            password=self.password,
         )
 
-        async with self.ensure_connected():
-            self.info = self.device.properties
-
+        self._store = get_store(self.hass, self.config_entry.entry_id)
+        if (stored := await self._store.async_load()) is not None:
+            # Set up from the last known properties and refresh them later,
+            # so setup does not wait for the camera.
+            self.info = stored[STORAGE_PROPERTIES]
+            self._info_loaded = True
+            refresh_task = self.hass.async_create_background_task(
+                self._async_refresh_info(), f"pppp_camera {self.dev_id} properties"
+            )
+            self.config_entry.async_on_unload(refresh_task.cancel)
+        else:
+            async with self.ensure_connected():
+                await self._async_update_info(self.device.properties)
+
+        self.config_entry.async_on_unload(self.async_stop)
+        self.watchdog.start()
+        self.config_entry.async_on_unload(self.watchdog.stop)
         self.config_entry.async_on_unload(
             self.config_entry.add_update_listener(self._async_update_listener)
         )
+        if self.restream is not None:
+            self.config_entry.async_on_unload(self.restream.async_stop)
+        if self.preroll is not None:
+            preroll_task = self.hass.async_create_background_task(
+                self._async_fill_preroll(), f"pppp_camera {self.dev_id} preroll"
+            )
+            self.config_entry.async_on_unload(preroll_task.cancel)
+        self._start_timelapse()
+        self.config_entry.async_on_unload(self._async_stop_timelapse)
+
+    async def _async_refresh_info(self) -> None:
+        """Read the properties from the camera once it can be reached."""
+        while True:
+            try:
+                async with self.ensure_connected():
+                    await self._async_update_info(self.device.properties)
+                return
+            except (TimeoutError, aiopppp.NotConnectedError) as err:
+                LOGGER.debug("Cannot refresh properties of %s: %s", self.host, err)
+            await asyncio.sleep(PROPERTIES_RETRY_DELAY)
+
+    async def _async_update_info(self, info: dict) -> None:
+        """Store new properties, reloading if they change the entities."""
+        if self._info_loaded and info == self.info:
+            return
+        old_info, self.info = self.info, info
+        was_loaded, self._info_loaded = self._info_loaded, True
+        await self._store.async_save({STORAGE_PROPERTIES: info})
+        if not was_loaded:
+            return
+
+        if (CONF_LAMP in old_info, bool(old_info.get("auth"))) != (
+            CONF_LAMP in info,
+            bool(info.get("auth")),
+        ):
+            self.hass.config_entries.async_schedule_reload(self.config_entry.entry_id)
+            return
+        device_registry = dr.async_get(self.hass)
+        if device_entry := device_registry.async_get_device(
+            identifiers={(DOMAIN, self.dev_id)}
+        ):
+            device_registry.async_update_device(
+                device_entry.id,
+                hw_version=info.get("mcuver"),
+                sw_version=info.get("sysver"),
+                model_id=info.get("sensor"),
+            )
 
     async def async_stop(self, event=None):
         """Shut it all down."""
-        await self.device.close()
+        await self.commands.async_stop()
+        if self.restream is not None:
+            await self.restream.async_stop()
+        await self.video.async_stop()
+        await self.connection.async_close()
+
+    async def async_get_snapshot(self) -> Frame | None:
+        """Return a recent frame, fetching a new one only if the cache is stale."""
+        frame = self.frames.latest
+        if frame and time.monotonic() - frame.timestamp <= self._snapshot_max_age:
+            return frame
+
+        if self._snapshot_task is None:
+            self._snapshot_task = self.hass.async_create_task(
+                self._async_fetch_snapshot()
+            )
+        return await asyncio.shield(self._snapshot_task)
+
+    async def _async_fetch_snapshot(self) -> Frame | None:
+        """Wait for the next frame from the camera."""
+        try:
+            async with self.frames.subscribe("snapshot") as frames:
+                return await frames.get()
+        finally:
+            self._snapshot_task = None
+
+    async def async_scale_frame(
+        self, frame: Frame, width: int | None, height: int | None
+    ) -> bytes:
+        """Return the frame scaled down to the requested size."""
+        key = (frame.seq, width, height)
+        if (task := self._scaled_images.get(key)) is None:
+            # Only the current frame is worth caching, drop older sequences.
+            for cached_key in list(self._scaled_images):
+                if cached_key[0] != frame.seq:
+                    del self._scaled_images[cached_key]
+            task = self._scaled_images[key] = self.hass.async_create_task(
+                self.hass.async_add_executor_job(
+                    scale_jpeg, frame.data, width, height
+                )
+            )
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            self._scaled_images.pop(key, None)
+            raise
+
+    async def _async_fill_preroll(self) -> None:
+        """Keep the pre-roll buffer filled with the latest frames."""
+        while True:
+            async with self.frames.subscribe("preroll") as frames:
+                async for frame in frames:
+                    self.preroll.append(frame)
+            await asyncio.sleep(PREROLL_RESTART_DELAY)
+
+    async def async_save_clip(
+        self, path: str, duration: float, lookback: float | None = None
+    ) -> int:
+        """Write buffered pre-roll plus `duration` seconds of new frames to disk.
+
+        Returns the number of frames written. No file is created without any.
+        """
+        writer = ClipWriter(path)
+        loop = self.hass.loop
+        # Subscribe before the pre-roll is written, so the frames of the
+        # trigger moment queue up meanwhile. The queue holds as many frames
+        # as the pre-roll, which takes longer to arrive than to write.
+        queue_size = CLIP_BATCH_SIZE * 2 + (
+            len(self.preroll) if self.preroll is not None else 0
+        )
+        try:
+            async with self.frames.subscribe("clip", queue_size) as frames:
+                deadline = loop.time() + duration
+                preroll = (
+                    self.preroll.frames(lookback) if self.preroll is not None else []
+                )
+                last_seq = preroll[-1].seq if preroll else 0
+                await self.hass.async_add_executor_job(writer.write, preroll)
+                batch: list[Frame] = []
+                while (remaining := deadline - loop.time()) > 0:
+                    try:
+                        async with asyncio.timeout(remaining):
+                            frame = await frames.get()
+                    except TimeoutError:
+                        break
+                    if frame is None:
+                        break
+                    # Frames queued while the pre-roll was written may be in it.
+                    if frame.seq > last_seq:
+                        batch.append(frame)
+                    if len(batch) >= CLIP_BATCH_SIZE:
+                        await self.hass.async_add_executor_job(writer.write, batch)
+                        batch = []
+                await self.hass.async_add_executor_job(writer.write, batch)
+        finally:
+            await self.hass.async_add_executor_job(writer.close)
+        return writer.frames
 
     async def async_white_light_toggle(self, data):
         """Turn on the white light."""
-        async with self.ensure_connected():
-            await self.device.session.toggle_whitelight(data)
+        with self.instrumentation.timer("white_light"):
+            await self.commands.async_run(
+                "white_light" if data is not None else None,
+                lambda: self.device.session.toggle_whitelight(data),
+            )
 
     async def async_white_light_on(self, data):
         """Turn on the white light."""
@@ -112,8 +412,11 @@ class PPPPDevice:
 
     async def async_ir_light_toggle(self, data):
         """Turn on the white light."""
-        async with self.ensure_connected():
-            await self.device.session.toggle_ir(data)
+        with self.instrumentation.timer("ir_light"):
+            await self.commands.async_run(
+                "ir_light" if data is not None else None,
+                lambda: self.device.session.toggle_ir(data),
+            )
 
     async def async_ir_light_on(self, data):
         """Turn on the white light."""
@@ -125,18 +428,19 @@ class PPPPDevice:
 
     async def async_reboot(self, data) -> None:
         """Send out a SystemReboot command."""
-        async with self.ensure_connected():
-            await self.device.reboot()
+        with self.instrumentation.timer("reboot"):
+            await self.commands.async_run("reboot", self.device.reboot)
 
 
     @contextlib.asynccontextmanager
     async def ensure_connected(self):
         """Ensure the device is connected."""
-        await self.connect()
+        with self.instrumentation.timer("ensure_connected"):
+            await self.connection.async_acquire()
         try:
             yield self
         finally:
-            await self.close()
+            self.connection.release()
 
     async def async_manually_set_date_and_time(self) -> None:
         """Set Date and Time Manually using SetSystemDateAndTime command."""
@@ -420,6 +724,11 @@ class PPPPDevice:
     #             LOGGER.error("Error trying to perform PTZ action: %s", err)
 
 
+def get_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Get the store holding the last known properties of a device."""
+    return Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id))
+
+
 def get_device(
     hass: HomeAssistant,
     host: str,
@@ -0,0 +1,42 @@
+"""Diagnostics support for PPPP Camera."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .device import PPPPDevice
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    device: PPPPDevice = hass.data[DOMAIN][entry.unique_id]
+
+    return {
+        "entry": {
+            "title": entry.title,
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "device": {
+            "available": device.available,
+            "properties": device.info,
+            "connection": device.connection.as_dict(),
+            "watchdog": device.watchdog.as_dict(),
+            "time_to_ready": device.warmup.ready.get(device.dev_id),
+            "commands": device.commands.as_dict(),
+        },
+        "video": {
+            "session": device.video.as_dict(),
+            **device.frames.as_dict(),
+        },
+        "instrumentation": device.instrumentation.as_dict(),
+    }
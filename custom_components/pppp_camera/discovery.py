@@ -1,12 +1,16 @@
 """Discovery for PPPP cameras."""
 
 import asyncio
-from ipaddress import ip_network, ip_address
-from typing import List
+import math
+from ipaddress import IPv4Network, ip_network, ip_address
+import time
+from typing import Any, List
 
 from aiopppp import Discovery, DeviceDescriptor
 from homeassistant.config_entries import (
+    SOURCE_IGNORE,
     SOURCE_INTEGRATION_DISCOVERY,
+    ConfigEntry,
 )
 from homeassistant.const import (
     CONF_HOST,
@@ -15,13 +19,46 @@ from homeassistant.const import (
     CONF_ENABLED,
 )
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.discovery_flow import async_create_flow
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.helpers.storage import Store
 from homeassistant.components import network
 
-from .const import DOMAIN, LOGGER, CONF_IP, CONF_DURATION, CONF_INTERVAL
+from .const import (
+    DOMAIN,
+    LOGGER,
+    CONF_IP,
+    CONF_DURATION,
+    CONF_INTERVAL,
+    CONF_PARALLEL,
+    CONF_SWEEP,
+    CONF_SWEEP_IN_FLIGHT,
+    CONF_SWEEP_RATE,
+    CONF_TTL,
+    CONF_MAX_INTERVAL,
+    ATTR_LAST_SEEN,
+    DISCOVERY_STORAGE_KEY,
+    STORAGE_DEVICES,
+    STORAGE_VERSION,
+    SIGNAL_DISCOVERY_REQUEST,
+)
 from .config_helpers import get_discovery_config
+from .sweep import SubnetSweep
+
+# Seconds between discovery broadcasts.
+DISCOVERY_PERIOD = 3
+# Seconds to collect registry changes before writing them.
+SAVE_DELAY = 60
+# Quick cycles run after a discovery request, and the seconds between them.
+BURST_CYCLES = 3
+BURST_DELAY = 15
+# Seconds between checks of the network adapters.
+ADAPTER_CHECK_INTERVAL = 60
 
 
 async def async_start_discovery(hass: HomeAssistant) -> None:
@@ -36,34 +73,223 @@ async def async_start_discovery(hass: HomeAssistant) -> None:
         LOGGER.info("PPPP camera discovery is disabled in configuration")
         return
 
-    async def discovery_loop() -> None:
+    registry = DiscoveryRegistry(hass, discovery_config.get(CONF_TTL, 604800))
+    await registry.async_load()
+    scheduler = DiscoveryScheduler(
+        hass,
+        PPPPDiscovery(hass, registry),
+        interval,
+        discovery_config.get(CONF_MAX_INTERVAL, 21600),
+    )
+    scheduler.start()
+
+
+@callback
+def async_request_discovery(hass: HomeAssistant, reason: str) -> None:
+    """Ask for a burst of discovery cycles, e.g. after a camera went away."""
+    async_dispatcher_send(hass, SIGNAL_DISCOVERY_REQUEST, reason)
+
+
+class DiscoveryScheduler:
+    """Runs discovery cycles, often when something changed and rarely otherwise.
+
+    After each cycle that finds nothing new, the delay before the next one
+    doubles, from `interval` up to `max_interval`. A burst of a few quick
+    cycles runs when discovery is requested, or when the network adapters
+    of Home Assistant change.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        discovery: "PPPPDiscovery",
+        interval: float,
+        max_interval: float,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._discovery = discovery
+        self._interval = interval
+        self._max_interval = max(interval, max_interval)
+        self._burst = 0
+        self._wakeup = asyncio.Event()
+        self._adapters: Any = None
+
+    def start(self) -> None:
+        """Start running discovery cycles."""
+        async_dispatcher_connect(
+            self.hass, SIGNAL_DISCOVERY_REQUEST, self.async_request_burst
+        )
+        self.hass.async_create_background_task(
+            self._async_run(), "pppp_camera discovery"
+        )
+
+    @callback
+    def async_request_burst(self, reason: str) -> None:
+        """Run a burst of discovery cycles right away."""
+        LOGGER.debug("Discovery requested: %s", reason)
+        self._burst = BURST_CYCLES
+        self._wakeup.set()
+
+    async def _async_run(self) -> None:
         """Run discovery loop indefinitely."""
+        delay = self._interval
         while True:
+            self._wakeup.clear()
             try:
-                await PPPPDiscovery(hass).async_run_discovery()
+                found = await self._discovery.async_run_discovery()
             except Exception as err:
                 LOGGER.error("Error during PPPP camera discovery: %s", err)
-            await asyncio.sleep(interval)
+                found = 0
+
+            if self._burst:
+                self._burst -= 1
+                delay = self._interval
+                next_delay = BURST_DELAY if self._burst else delay
+            else:
+                delay = self._interval if found else min(delay * 2, self._max_interval)
+                next_delay = delay
+            LOGGER.debug("Next PPPP camera discovery in %d s", next_delay)
+            await self._async_wait(next_delay)
+
+    async def _async_wait(self, delay: float) -> None:
+        """Wait for the delay, a discovery request or a network change."""
+        deadline = self.hass.loop.time() + delay
+        while (remaining := deadline - self.hass.loop.time()) > 0:
+            try:
+                async with asyncio.timeout(min(remaining, ADAPTER_CHECK_INTERVAL)):
+                    await self._wakeup.wait()
+                return
+            except TimeoutError:
+                pass
+            if await self._async_adapters_changed():
+                self.async_request_burst("network adapters changed")
+                return
+
+    async def _async_adapters_changed(self) -> bool:
+        """Return True if the enabled IPv4 addresses changed since last call."""
+        try:
+            adapters = await network.async_get_adapters(self.hass)
+        except Exception as err:  # noqa: BLE001
+            LOGGER.debug("Failed to get network adapters: %s", err)
+            return False
+        current = sorted(
+            (ip_info["address"], ip_info["network_prefix"])
+            for adapter in adapters
+            if adapter.get("enabled", False)
+            for ip_info in adapter.get("ipv4", [])
+        )
+        previous, self._adapters = self._adapters, current
+        return previous is not None and previous != current
+
 
-    hass.loop.create_task(discovery_loop())
+class DiscoveryRegistry:
+    """Remembers discovered devices across discovery cycles and restarts.
+
+    Each device is stored by dev_id with the host it was last seen at and
+    when. Devices not seen for `ttl` seconds are forgotten.
+    """
+
+    def __init__(self, hass: HomeAssistant, ttl: float) -> None:
+        """Initialize the registry."""
+        self.hass = hass
+        self._ttl = ttl
+        self._store = Store(hass, STORAGE_VERSION, DISCOVERY_STORAGE_KEY)
+        self._devices: dict[str, dict[str, Any]] = {}
+        self._announced = set[str]()
+
+    async def async_load(self) -> None:
+        """Load the devices seen before the restart."""
+        if (data := await self._store.async_load()) is not None:
+            self._devices = data[STORAGE_DEVICES]
+        self.async_expire()
+
+    @callback
+    def async_expire(self) -> None:
+        """Forget devices that were not seen for the TTL."""
+        now = time.time()
+        expired = [
+            dev_id
+            for dev_id, device in self._devices.items()
+            if now - device[ATTR_LAST_SEEN] > self._ttl
+        ]
+        for dev_id in expired:
+            del self._devices[dev_id]
+            self._announced.discard(dev_id)
+        if expired:
+            self._async_schedule_save()
+
+    @callback
+    def async_seen(self, dev_id: str, host: str) -> bool:
+        """Record a sighting and return True if it should start a flow.
+
+        That is the case for new devices, devices at a new host, and known
+        devices without a config entry that were not announced since startup,
+        since their earlier flows did not survive the restart.
+        """
+        known = self._devices.get(dev_id)
+        self._devices[dev_id] = {CONF_HOST: host, ATTR_LAST_SEEN: time.time()}
+        self._async_schedule_save()
+
+        if known is None or known[CONF_HOST] != host:
+            self._announced.add(dev_id)
+            return True
+        if dev_id in self._announced:
+            return False
+        self._announced.add(dev_id)
+        return (
+            self.hass.config_entries.async_entry_for_domain_unique_id(DOMAIN, dev_id)
+            is None
+        )
+
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(
+            lambda: {STORAGE_DEVICES: self._devices}, SAVE_DELAY
+        )
 
 
 class PPPPDiscovery:
     """Class to manage PPPP camera discovery."""
 
-    def __init__(self, hass: HomeAssistant) -> None:
+    def __init__(self, hass: HomeAssistant, registry: DiscoveryRegistry) -> None:
         """Initialize the discovery class."""
         self.hass = hass
-        self.discovered_devices = set[str]()
+        self.registry = registry
+        self._found = 0
+        self._sweep: SubnetSweep | None = None
 
-    async def async_run_discovery(self) -> None:
-        """Run PPPP camera discovery periodically."""
+    async def async_run_discovery(self) -> int:
+        """Run a PPPP camera discovery cycle, returning the number of new finds."""
+
+        self.registry.async_expire()
+        self._found = 0
 
         # Get discovery configuration
         discovery_config = get_discovery_config(self.hass)
         duration = discovery_config.get(CONF_DURATION, 10)  # Default to 10 seconds
+        parallel = discovery_config.get(CONF_PARALLEL, 16)
         custom_ips = discovery_config.get(CONF_IP)
 
+        def device_callback(device: DeviceDescriptor):
+            self._discovered_device_callback(device.addr, device.dev_id.dev_id)
+
+        if sweep := discovery_config.get(CONF_SWEEP):
+            # Probe every host by unicast instead of listening on broadcast.
+            # The sweep is kept, so one cut off by the deadline is resumed
+            # by the next cycle.
+            if self._sweep is None:
+                self._sweep = SubnetSweep(
+                    self._get_sweep_networks(sweep),
+                    discovery_config.get(CONF_SWEEP_RATE, 500),
+                    discovery_config.get(CONF_SWEEP_IN_FLIGHT, 512),
+                )
+            try:
+                async with asyncio.timeout(duration):
+                    await self._sweep.async_sweep(device_callback)
+            except TimeoutError:
+                LOGGER.debug("Discovery deadline reached during the sweep")
+            return self._found
+
         # Determine which IPs to use for discovery
         discovery_ips = (
             self._get_custom_ips(custom_ips)
@@ -75,33 +301,56 @@ class PPPPDiscovery:
             LOGGER.warning(
                 "No discovery IPs found, PPPP camera discovery will not run."
             )
-            return
-
-        def device_callback(device: DeviceDescriptor):
-            self._discovered_device_callback(device.addr, device.dev_id.dev_id)
-
-        for ip in discovery_ips:
-            LOGGER.info("Starting discovery on IP: %s", ip)
-
-            discovery = Discovery(ip)
-            task = asyncio.create_task(discovery.discover(device_callback, period=3))
-            try:
-                await asyncio.sleep(duration)
-            finally:
-                task.cancel()
+            return 0
+
+        # Listen on all targets at once under one deadline. If there are more
+        # targets than parallel listeners, they take turns in waves that
+        # share the duration.
+        waves = math.ceil(len(discovery_ips) / parallel)
+        listen_time = duration / waves
+        period = max(1, min(DISCOVERY_PERIOD, listen_time / 2))
+        semaphore = asyncio.Semaphore(parallel)
+
+        async def async_discover(ip: str) -> None:
+            async with semaphore:
+                LOGGER.info("Starting discovery on IP: %s", ip)
                 try:
-                    await task
-                except asyncio.CancelledError:
-                    LOGGER.debug("Discovery task for IP %s cancelled", ip)
+                    async with asyncio.timeout(listen_time):
+                        await Discovery(ip).discover(device_callback, period=period)
+                except TimeoutError:
+                    LOGGER.debug("Discovery on IP %s finished", ip)
+                except OSError as err:
+                    LOGGER.warning("Discovery on IP %s failed: %s", ip, err)
+
+        try:
+            async with asyncio.timeout(duration):
+                await asyncio.gather(*(async_discover(ip) for ip in discovery_ips))
+        except TimeoutError:
+            LOGGER.debug("Discovery deadline reached")
+        return self._found
 
     def _discovered_device_callback(self, host: str, device_id: str) -> None:
         """Handle discovered PPPP camera device."""
 
-        if device_id in self.discovered_devices:
+        announce = self.registry.async_seen(device_id, host)
+
+        # The entry is looked up on every sighting, not cached, so a camera
+        # whose entry points elsewhere is moved even if the registry already
+        # knew its new host. The lookup is indexed by domain and unique ID.
+        entry = self.hass.config_entries.async_entry_for_domain_unique_id(
+            DOMAIN, device_id
+        )
+        if entry is not None:
+            if entry.source != SOURCE_IGNORE and entry.options.get(CONF_HOST) != host:
+                self._async_move_entry(entry, host)
+            return
+
+        if not announce:
             LOGGER.debug("Already discovered device ID %s, ignoring.", device_id)
             return
 
         LOGGER.info("Discovered PPPP camera at %s with device ID: %s", host, device_id)
+        self._found += 1
 
         # Create a discovery flow using the proper helper
         discovery_info = {
@@ -116,7 +365,23 @@ class PPPPDiscovery:
             data=discovery_info,
         )
 
-        self.discovered_devices.add(device_id)
+    @callback
+    def _async_move_entry(self, entry: ConfigEntry, host: str) -> None:
+        """Point a configured camera at the host it was found at.
+
+        The running device reconnects to the new host from its update
+        listener, so the entry is not reloaded.
+        """
+        LOGGER.info(
+            "PPPP camera %s moved from %s to %s",
+            entry.unique_id,
+            entry.options.get(CONF_HOST),
+            host,
+        )
+        self._found += 1
+        self.hass.config_entries.async_update_entry(
+            entry, options={**entry.options, CONF_HOST: host}
+        )
 
     def _get_custom_ips(self, custom_ips) -> List[str]:
         """Process custom IP configuration into a list of valid IPs."""
@@ -148,6 +413,27 @@ class PPPPDiscovery:
         LOGGER.info("Using %d custom discovery IPs: %s", len(valid_ips), valid_ips)
         return valid_ips
 
+    def _get_sweep_networks(self, sweep) -> List[IPv4Network]:
+        """Process sweep configuration into a list of valid networks."""
+
+        # Handle both string and list of strings
+        if isinstance(sweep, str):
+            sweep = [sweep]
+
+        networks = []
+        for cidr in sweep:
+            try:
+                networks.append(IPv4Network(cidr, strict=False))
+            except ValueError:
+                LOGGER.warning("Invalid network in sweep configuration: %s", cidr)
+
+        if not networks:
+            LOGGER.error("No valid networks provided in sweep configuration: %s", sweep)
+            raise HomeAssistantError("No valid networks provided in sweep configuration")
+
+        LOGGER.info("Sweeping %d networks: %s", len(networks), networks)
+        return networks
+
     async def _async_get_broadcast_ips(self) -> List[str]:
         """Get broadcast IPs for all enabled HA network adapters."""
         broadcast_ips = []
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import Entity
 
-from .const import DOMAIN
+from .const import DOMAIN, SIGNAL_AVAILABILITY
 from .device import PPPPDevice
 
 
@@ -14,6 +15,16 @@ class PPPPBaseEntity(Entity):
         """Initialize the PPPP entity."""
         self.device: PPPPDevice = device
 
+    async def async_added_to_hass(self) -> None:
+        """Update the state when the device availability changes."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_AVAILABILITY.format(self.device.config_entry.entry_id),
+                self.async_write_ha_state,
+            )
+        )
+
     @property
     def available(self):
         """Return True if device is available."""
@@ -23,7 +34,7 @@ class PPPPBaseEntity(Entity):
     def device_info(self) -> DeviceInfo:
         """Return a device description for device registry."""
 
-        camera_properties = self.device.device.properties
+        camera_properties = self.device.info
         return DeviceInfo(
             identifiers={(DOMAIN, self.device.dev_id)},
             hw_version=camera_properties.get('mcuver'),
@@ -0,0 +1,223 @@
+"""Shared video frame distribution for PPPP cameras."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiopppp
+
+from .const import LOGGER
+from .jpeg import is_valid_jpeg
+from .stats import StreamStats
+
+if TYPE_CHECKING:
+    from .device import PPPPDevice
+
+FRAME_TIMEOUT = 10
+SUBSCRIBER_QUEUE_SIZE = 2
+# Name prefix of the subscribers that serve MJPEG viewers.
+VIEWER_PREFIX = "mjpeg "
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    """A single JPEG frame received from the camera."""
+
+    seq: int
+    data: bytes
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+class FrameSubscriber:
+    """A consumer of frames that keeps only the newest few of them.
+
+    When the consumer falls behind, the oldest queued frame is dropped, so a
+    slow viewer never stalls the reader or other viewers and its memory use
+    stays bounded. Frames are shared between subscribers, not copied.
+    """
+
+    def __init__(self, name: str, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        """Initialize the subscriber."""
+        self.name = name
+        self._frames: deque[Frame] = deque(maxlen=maxsize)
+        self._event = asyncio.Event()
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def lag(self) -> int:
+        """Return the number of frames waiting to be consumed."""
+        return len(self._frames)
+
+    @property
+    def lag_seconds(self) -> float:
+        """Return the age of the oldest frame waiting to be consumed."""
+        if not self._frames:
+            return 0
+        return time.monotonic() - self._frames[0].timestamp
+
+    def put(self, frame: Frame) -> bool:
+        """Queue a frame, return True if the oldest one had to be dropped."""
+        if self.closed:
+            return False
+        dropped = len(self._frames) == self._frames.maxlen
+        if dropped:
+            self.dropped += 1
+        self._frames.append(frame)
+        self._event.set()
+        return dropped
+
+    def close(self) -> None:
+        """Signal the end of the stream to the consumer."""
+        self.closed = True
+        self._event.set()
+
+    async def get(self) -> Frame | None:
+        """Return the next frame or None once the stream has ended."""
+        while not self._frames:
+            if self.closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        self.delivered += 1
+        return self._frames.popleft()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the subscriber counters."""
+        return {
+            "name": self.name,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "lag": self.lag,
+            "lag_seconds": round(self.lag_seconds, 3),
+        }
+
+    def __aiter__(self) -> FrameSubscriber:
+        return self
+
+    async def __anext__(self) -> Frame:
+        if (frame := await self.get()) is None:
+            raise StopAsyncIteration
+        return frame
+
+
+class FrameBroadcaster:
+    """Reads frames from a device once and fans them out to subscribers."""
+
+    def __init__(
+        self,
+        device: PPPPDevice,
+        queue_size: int = SUBSCRIBER_QUEUE_SIZE,
+        repeat_corrupt: bool = False,
+    ) -> None:
+        """Initialize the broadcaster.
+
+        Corrupt frames are dropped, or replaced by the last good frame if
+        `repeat_corrupt` is set.
+        """
+        self._device = device
+        self._queue_size = queue_size
+        self._repeat_corrupt = repeat_corrupt
+        self._subscribers: set[FrameSubscriber] = set()
+        self._seq = 0
+        self.corrupt = 0
+        self.dropped = 0
+        self.latest: Frame | None = None
+        self.stats = StreamStats()
+
+    @property
+    def viewer_count(self) -> int:
+        """Return the number of MJPEG viewers, leaving out internal consumers."""
+        return sum(
+            subscriber.name.startswith(VIEWER_PREFIX)
+            for subscriber in self._subscribers
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the broadcaster state and per-subscriber counters."""
+        return {
+            "frames": self._seq,
+            "corrupt": self.corrupt,
+            "dropped": self.dropped,
+            "subscribers": [
+                subscriber.as_dict() for subscriber in self._subscribers
+            ],
+        }
+
+    @contextlib.asynccontextmanager
+    async def subscribe(
+        self, name: str, maxsize: int | None = None
+    ) -> AsyncIterator[FrameSubscriber]:
+        """Subscribe to the frame stream for the duration of the context.
+
+        The subscription counts as a video consumer, so video is started if
+        needed. If it cannot be started, the subscriber is returned closed.
+        """
+        subscriber = FrameSubscriber(name, maxsize or self._queue_size)
+        acquired = False
+        self._subscribers.add(subscriber)
+        try:
+            try:
+                await self._device.video.async_acquire()
+                acquired = True
+            except (TimeoutError, aiopppp.NotConnectedError) as err:
+                if self._device.available:
+                    LOGGER.warning(
+                        "Error starting video on %s: %s", self._device.host, err
+                    )
+                else:
+                    LOGGER.debug("%s is unavailable: %s", self._device.host, err)
+                subscriber.close()
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+            subscriber.close()
+            if acquired:
+                self._device.video.release()
+
+    def _publish(self, data: bytes) -> None:
+        """Hand a frame over to every subscriber."""
+        if not is_valid_jpeg(data):
+            self.corrupt += 1
+            LOGGER.debug("Corrupt frame from %s (%d bytes)", self._device.host, len(data))
+            if not self._repeat_corrupt or self.latest is None:
+                return
+            data = self.latest.data
+        self._seq += 1
+        frame = self.latest = Frame(self._seq, data)
+        for subscriber in self._subscribers:
+            if subscriber.put(frame):
+                self.dropped += 1
+
+    async def async_read_frames(self) -> None:
+        """Publish frames until the stream ends or the reader is cancelled."""
+        device = self._device.device
+        self.stats.restart()
+        try:
+            while True:
+                try:
+                    with self._device.instrumentation.timer("get_video_frame"):
+                        frame = await asyncio.wait_for(
+                            device.get_video_frame(), timeout=FRAME_TIMEOUT
+                        )
+                except asyncio.TimeoutError:
+                    LOGGER.warning("Error getting video frame: Timeout")
+                    break
+                except aiopppp.NotConnectedError as err:
+                    LOGGER.warning("Error getting video frame: %s", err)
+                    break
+                if not frame:
+                    LOGGER.warning("Error getting video frame: empty frame")
+                    break
+                self.stats.record(len(frame.data), time.monotonic())
+                self._publish(frame.data)
+        finally:
+            for subscriber in self._subscribers:
+                subscriber.close()
@@ -0,0 +1,66 @@
+"""Opt-in latency instrumentation of PPPP camera hot paths."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import contextlib
+import time
+from typing import Any, ContextManager
+
+from .stats import Histogram
+
+# Latency bucket upper bounds in milliseconds.
+LATENCY_BUCKETS = (
+    1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000,
+)
+
+_DISABLED = contextlib.nullcontext()
+
+
+class Instrumentation:
+    """Collects timings of named operations into fixed-bucket histograms.
+
+    When disabled, `timer` returns a shared no-op context manager, so
+    instrumented code pays only for a method call.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Initialize the instrumentation."""
+        self.enabled = enabled
+        self._histograms: dict[str, Histogram] = {}
+
+    def timer(self, name: str) -> ContextManager[None]:
+        """Return a context manager timing the enclosed block."""
+        if not self.enabled:
+            return _DISABLED
+        return self._time(name)
+
+    @contextlib.contextmanager
+    def _time(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record the duration of an operation."""
+        if not self.enabled:
+            return
+        if (histogram := self._histograms.get(name)) is None:
+            histogram = self._histograms[name] = Histogram(LATENCY_BUCKETS)
+        histogram.record(seconds * 1000)
+
+    def reset(self) -> None:
+        """Forget all timings."""
+        self._histograms.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all histograms, with times in milliseconds."""
+        return {
+            "enabled": self.enabled,
+            "timings": {
+                name: histogram.as_dict()
+                for name, histogram in sorted(self._histograms.items())
+            },
+        }
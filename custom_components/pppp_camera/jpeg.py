@@ -0,0 +1,80 @@
+"""JPEG helpers for PPPP camera frames."""
+
+from __future__ import annotations
+
+import io
+
+from PIL import Image
+
+JPEG_QUALITY = 75
+
+
+def scale_jpeg(data: bytes, width: int | None, height: int | None) -> bytes:
+    """Downscale a JPEG to fit within the requested size.
+
+    The decoder is put into draft mode so it only reconstructs the image at
+    1/2, 1/4 or 1/8 scale, picking the smallest one that still covers the
+    requested size, and the rest is resized from there. The original data is
+    returned if it already fits.
+    """
+    if (width is not None and width <= 0) or (height is not None and height <= 0):
+        raise ValueError(f"Invalid image size {width}x{height}")
+
+    with Image.open(io.BytesIO(data)) as image:
+        if width is None:
+            width = max(1, image.width * height // image.height)
+        if height is None:
+            height = max(1, image.height * width // image.width)
+
+        if width >= image.width and height >= image.height:
+            return data
+
+        image.draft("RGB", (width, height))
+        # draft() only gets within a factor of two, thumbnail() does the rest.
+        image.thumbnail((width, height))
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=JPEG_QUALITY)
+        return output.getvalue()
+
+
+def jpeg_size(data: bytes) -> tuple[int, int]:
+    """Return the dimensions of a JPEG by reading its header only."""
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def is_valid_jpeg(data: bytes) -> bool:
+    """Check that a JPEG is structurally complete without decoding it.
+
+    Verifies the SOI marker, walks the marker segments up to the start of scan
+    checking that every declared length fits, and expects the EOI marker at
+    the end, ignoring zero padding some cameras append.
+    """
+    size = len(data)
+    if size < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return False
+
+    pos = 2
+    while True:
+        if pos + 4 > size or data[pos] != 0xFF:
+            return False
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        if marker == 0xD9:
+            return False
+        length = (data[pos + 2] << 8) | data[pos + 3]
+        if length < 2 or pos + 2 + length > size:
+            return False
+        pos += 2 + length
+        if marker == 0xDA:
+            break
+
+    end = size
+    while end > pos and data[end - 1] == 0:
+        end -= 1
+    return end - pos >= 2 and data[end - 2] == 0xFF and data[end - 1] == 0xD9
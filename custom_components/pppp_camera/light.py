@@ -15,7 +15,6 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .const import DOMAIN, CONF_LAMP
 from .device import PPPPDevice
 from .entity import PPPPBaseEntity
-from .config_helpers import get_platform_config
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -41,7 +40,7 @@ LIGHTS: tuple[PPPPLightEntityDescription, ...] = (
         turn_off_data=None,
         turn_on_fn=lambda device: device.async_white_light_on,
         turn_off_fn=lambda device: device.async_white_light_off,
-        supported_fn=lambda device, hass: CONF_LAMP in device.device.properties and get_platform_config(hass)[CONF_LAMP] == Platform.LIGHT,
+        supported_fn=lambda device, hass: CONF_LAMP in device.info and device.lamp_platform == Platform.LIGHT,
         icon="mdi:flashlight"
     ),
     PPPPLightEntityDescription(
@@ -51,7 +50,7 @@ LIGHTS: tuple[PPPPLightEntityDescription, ...] = (
         turn_off_data=None,
         turn_on_fn=lambda device: device.async_ir_light_on,
         turn_off_fn=lambda device: device.async_ir_light_off,
-        supported_fn=lambda device, hass: CONF_LAMP in device.device.properties and get_platform_config(hass)[CONF_LAMP] == Platform.LIGHT,
+        supported_fn=lambda device, hass: CONF_LAMP in device.info and device.lamp_platform == Platform.LIGHT,
         icon="mdi:lightbulb-night",
     ),
 )
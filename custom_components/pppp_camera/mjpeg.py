@@ -0,0 +1,88 @@
+"""Multipart MJPEG response writer."""
+
+from __future__ import annotations
+
+from aiohttp import web
+from aiohttp.abc import AbstractStreamWriter
+from homeassistant.util import uuid
+
+CONTENT_LENGTH = 1000000000000
+
+ADAPTIVE_SMOOTHING = 0.2
+ADAPTIVE_HEADROOM = 2
+ADAPTIVE_MAX_INTERVAL = 5
+
+
+class MjpegStreamWriter:
+    """Writes JPEG frames as a multipart/x-mixed-replace HTTP response."""
+
+    def __init__(self, boundary: str | None = None) -> None:
+        """Initialize the writer and precompute the part header prefix."""
+        self.boundary = boundary or "--frame" + uuid.random_uuid_hex()
+        self._part_prefix = (
+            f"--{self.boundary}\r\n"
+            "Content-Type: image/jpeg\r\n"
+            "Content-Length: "
+        ).encode()
+        self.response = web.StreamResponse()
+        self.response.content_type = (
+            f"multipart/x-mixed-replace; boundary={self.boundary}"
+        )
+        self.response.content_length = CONTENT_LENGTH
+        self._writer: AbstractStreamWriter | None = None
+
+    async def prepare(self, request: web.Request) -> None:
+        """Send the response headers."""
+        self._writer = await self.response.prepare(request)
+
+    async def write_frame(self, data: bytes) -> None:
+        """Write one JPEG part.
+
+        The part header is queued without waiting for the transport to drain,
+        then the payload is handed to the transport as is, so each frame costs
+        at most one drain and the JPEG is never copied into a joined buffer.
+        """
+        await self._writer.write(
+            self._part_prefix + b"%d\r\n\r\n" % len(data), drain=False
+        )
+        await self._writer.write(data)
+
+
+class FrameRateLimiter:
+    """Decides which frames are sent to a viewer.
+
+    Frames arriving faster than `max_fps` are skipped before anything is
+    written. In adaptive mode the interval between frames also grows with the
+    viewer's write latency, so a slow client gets fewer frames instead of a
+    growing backlog, and recovers once its writes become fast again.
+    """
+
+    def __init__(self, max_fps: float | None = None, adaptive: bool = False) -> None:
+        """Initialize the limiter."""
+        self._min_interval = 1 / max_fps if max_fps else 0.0
+        self._adaptive = adaptive
+        self._interval = self._min_interval
+        self._latency = 0.0
+        self._last_sent = float("-inf")
+
+    @property
+    def fps(self) -> float | None:
+        """Return the current frame rate limit."""
+        return 1 / self._interval if self._interval else None
+
+    def accept(self, timestamp: float) -> bool:
+        """Return True if a frame taken at `timestamp` should be sent."""
+        if timestamp - self._last_sent < self._interval:
+            return False
+        self._last_sent = timestamp
+        return True
+
+    def record_write(self, seconds: float) -> None:
+        """Adapt the interval to how long the last frame took to write."""
+        if not self._adaptive:
+            return
+        self._latency += (seconds - self._latency) * ADAPTIVE_SMOOTHING
+        self._interval = min(
+            max(self._min_interval, self._latency * ADAPTIVE_HEADROOM),
+            ADAPTIVE_MAX_INTERVAL,
+        )
@@ -0,0 +1,167 @@
+"""Restream PPPP camera frames as H.264 for Home Assistant's stream component."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.components.ffmpeg import get_ffmpeg_manager
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from homeassistant.components.stream import Stream
+
+    from .device import PPPPDevice
+
+PLAYLIST = "stream.m3u8"
+PLAYLIST_TIMEOUT = 15
+RESTART_DELAY = 5
+# Seconds of video per HLS segment.
+HLS_TIME = 2
+# Seconds between checks whether the playlist is still read.
+IDLE_CHECK_INTERVAL = 5
+
+FFMPEG_ARGS = (
+    "-hide_banner",
+    "-loglevel", "error",
+    "-f", "mjpeg",
+    "-use_wallclock_as_timestamps", "1",
+    "-i", "pipe:0",
+    "-c:v", "libx264",
+    "-preset", "veryfast",
+    "-tune", "zerolatency",
+    "-pix_fmt", "yuv420p",
+    "-force_key_frames", "expr:gte(t,n_forced*2)",
+    "-f", "hls",
+    "-hls_time", str(HLS_TIME),
+    "-hls_list_size", "5",
+    "-hls_flags", "delete_segments+omit_endlist",
+)
+
+
+class Restreamer:
+    """Feeds the shared frame stream through one ffmpeg process per camera.
+
+    Frames are encoded once into H.264 and written as a local HLS playlist,
+    which is handed to Home Assistant as the camera's stream source. ffmpeg
+    keeps running while the camera's `stream` has outputs. Once it had none
+    for `linger` seconds, ffmpeg and its frame subscription are stopped, and
+    the camera starts them again when the stream is opened again.
+    """
+
+    def __init__(self, device: PPPPDevice, linger: float) -> None:
+        """Initialize the restreamer."""
+        self._device = device
+        self._linger = linger
+        self._task: asyncio.Task | None = None
+        self._last_used = 0.0
+        self.stream: Stream | None = None
+
+    @property
+    def output_dir(self) -> str:
+        """Return the directory the HLS playlist and segments are written to."""
+        return os.path.join(tempfile.gettempdir(), DOMAIN, self._device.dev_id)
+
+    @property
+    def playlist(self) -> str:
+        """Return the path of the HLS playlist."""
+        return os.path.join(self.output_dir, PLAYLIST)
+
+    async def async_get_source(self) -> str | None:
+        """Start restreaming if needed and return the playlist path."""
+        self._last_used = time.monotonic()
+        if self._task is None:
+            await self._device.hass.async_add_executor_job(self._prepare_output_dir)
+            self._task = self._device.hass.async_create_background_task(
+                self._async_run(), f"pppp_camera {self._device.dev_id} restream"
+            )
+
+        try:
+            async with asyncio.timeout(PLAYLIST_TIMEOUT):
+                while not await self._device.hass.async_add_executor_job(
+                    os.path.exists, self.playlist
+                ):
+                    await asyncio.sleep(0.5)
+        except TimeoutError:
+            LOGGER.warning("Restream of %s has not started yet", self._device.host)
+            return None
+        return self.playlist
+
+    async def async_stop(self) -> None:
+        """Stop restreaming."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _prepare_output_dir(self) -> None:
+        """Start from an empty output directory."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    async def _async_run(self) -> None:
+        """Keep ffmpeg running while the stream is in use."""
+        encoder = self._device.hass.async_create_background_task(
+            self._async_keep_encoding(),
+            f"pppp_camera {self._device.dev_id} restream encoder",
+        )
+        try:
+            await self._async_wait_idle()
+            LOGGER.debug("Restream of %s is no longer used", self._device.host)
+        finally:
+            encoder.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await encoder
+            if self._task is asyncio.current_task():
+                self._task = None
+
+    async def _async_wait_idle(self) -> None:
+        """Return once the stream had no outputs for the linger period."""
+        while True:
+            await asyncio.sleep(IDLE_CHECK_INTERVAL)
+            if self._in_use():
+                self._last_used = time.monotonic()
+            elif time.monotonic() - self._last_used > self._linger:
+                return
+
+    def _in_use(self) -> bool:
+        """Return True if the stream has an output, e.g. HLS or a recording."""
+        return self.stream is not None and bool(self.stream.outputs())
+
+    async def _async_keep_encoding(self) -> None:
+        """Keep ffmpeg running, restarting it when the stream ends."""
+        while True:
+            try:
+                await self._async_encode()
+            except (OSError, ValueError) as err:
+                LOGGER.warning("Restream of %s failed: %s", self._device.host, err)
+            await asyncio.sleep(RESTART_DELAY)
+
+    async def _async_encode(self) -> None:
+        """Pipe frames into a single ffmpeg process until the stream ends."""
+        process = await asyncio.create_subprocess_exec(
+            get_ffmpeg_manager(self._device.hass).binary,
+            *FFMPEG_ARGS,
+            self.playlist,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            async with self._device.frames.subscribe("restream") as frames:
+                async for frame in frames:
+                    process.stdin.write(frame.data)
+                    await process.stdin.drain()
+        finally:
+            if process.returncode is None:
+                process.stdin.close()
+                try:
+                    async with asyncio.timeout(5):
+                        await process.wait()
+                except TimeoutError:
+                    process.kill()
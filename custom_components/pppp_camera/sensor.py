@@ -0,0 +1,126 @@
+"""PPPP sensors reporting video stream performance."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfDataRate, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import StateType
+
+from .const import DOMAIN
+from .device import PPPPDevice
+from .entity import PPPPBaseEntity
+
+SCAN_INTERVAL = timedelta(seconds=10)
+
+
+@dataclass(frozen=True, kw_only=True)
+class PPPPSensorEntityDescription(SensorEntityDescription):
+    """Describes PPPP sensor entity."""
+
+    value_fn: Callable[[PPPPDevice], StateType]
+
+
+SENSORS: tuple[PPPPSensorEntityDescription, ...] = (
+    PPPPSensorEntityDescription(
+        key="fps",
+        translation_key="fps",
+        native_unit_of_measurement="fps",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda device: device.frames.stats.fps,
+        icon="mdi:filmstrip",
+    ),
+    PPPPSensorEntityDescription(
+        key="bitrate",
+        translation_key="bitrate",
+        device_class=SensorDeviceClass.DATA_RATE,
+        native_unit_of_measurement=UnitOfDataRate.KILOBITS_PER_SECOND,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda device: device.frames.stats.kbps,
+    ),
+    PPPPSensorEntityDescription(
+        key="frame_interval",
+        translation_key="frame_interval",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda device: device.frames.stats.interval_mean,
+    ),
+    PPPPSensorEntityDescription(
+        key="frame_interval_p95",
+        translation_key="frame_interval_p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda device: device.frames.stats.interval_p95,
+    ),
+    PPPPSensorEntityDescription(
+        key="dropped_frames",
+        translation_key="dropped_frames",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda device: device.frames.dropped,
+        icon="mdi:image-remove",
+    ),
+    PPPPSensorEntityDescription(
+        key="corrupt_frames",
+        translation_key="corrupt_frames",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda device: device.frames.corrupt,
+        icon="mdi:image-broken-variant",
+    ),
+    PPPPSensorEntityDescription(
+        key="viewers",
+        translation_key="viewers",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda device: device.frames.viewer_count,
+        icon="mdi:eye",
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up a PPPP sensor platform."""
+    device = hass.data[DOMAIN][config_entry.unique_id]
+
+    async_add_entities(PPPPSensor(device, description) for description in SENSORS)
+
+
+class PPPPSensor(PPPPBaseEntity, SensorEntity):
+    """A PPPP stream statistics sensor."""
+
+    entity_description: PPPPSensorEntityDescription
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self, device: PPPPDevice, description: PPPPSensorEntityDescription
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(device)
+
+        self._attr_unique_id = f"{self.device.dev_id}_{description.key}"
+        self.entity_description = description
+
+    async def async_update(self) -> None:
+        """Close the statistics window if it has passed."""
+        self.device.frames.stats.update()
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the sensor value."""
+        return self.entity_description.value_fn(self.device)
@@ -0,0 +1,119 @@
+"""Cheap accumulators for stream performance statistics."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+import time
+from typing import Any
+
+STATS_WINDOW = 10
+
+# Frame interval bucket upper bounds in milliseconds.
+INTERVAL_BUCKETS = (
+    10, 20, 33, 50, 67, 83, 100, 125, 150, 200, 250, 333, 500, 750,
+    1000, 1500, 2000, 3000, 5000, 10000,
+)
+
+
+class Histogram:
+    """Histogram with fixed bucket bounds, recording in constant time."""
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        """Initialize the histogram."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, value: float) -> None:
+        """Add a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def reset(self) -> None:
+        """Forget all values."""
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the recorded values."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                break
+        return self.bounds[min(index, len(self.bounds) - 1)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as a dict."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)},
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class StreamStats:
+    """Frame rate, bitrate and frame interval over fixed time windows.
+
+    Recording a frame is constant time. Values are computed once per window
+    and describe the last completed window.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self._intervals = Histogram(INTERVAL_BUCKETS)
+        self._window_start = time.monotonic()
+        self._frames = 0
+        self._bytes = 0
+        self._last_timestamp: float | None = None
+        self.fps: float = 0
+        self.kbps: float = 0
+        self.interval_mean: float | None = None
+        self.interval_p95: float | None = None
+
+    def restart(self) -> None:
+        """Ignore the gap before the next frame, e.g. after video restarts."""
+        self._last_timestamp = None
+
+    def record(self, size: int, timestamp: float) -> None:
+        """Account for a received frame."""
+        self._roll(timestamp)
+        if self._last_timestamp is not None:
+            self._intervals.record((timestamp - self._last_timestamp) * 1000)
+        self._last_timestamp = timestamp
+        self._frames += 1
+        self._bytes += size
+
+    def update(self) -> None:
+        """Close the current window if it has passed."""
+        self._roll(time.monotonic())
+
+    def _roll(self, now: float) -> None:
+        elapsed = now - self._window_start
+        if elapsed < STATS_WINDOW:
+            return
+        self.fps = round(self._frames / elapsed, 2)
+        self.kbps = round(self._bytes * 8 / 1000 / elapsed, 1)
+        mean = self._intervals.mean
+        self.interval_mean = round(mean, 1) if mean is not None else None
+        self.interval_p95 = self._intervals.percentile(0.95)
+        self._intervals.reset()
+        self._window_start = now
+        self._frames = 0
+        self._bytes = 0
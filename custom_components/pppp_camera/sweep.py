@@ -0,0 +1,162 @@
+"""Unicast subnet sweep for PPPP cameras behind networks that drop broadcast."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+from collections import deque
+from collections.abc import Callable, Iterable
+import itertools
+from ipaddress import IPv4Address, IPv4Network, collapse_addresses
+from typing import Any
+
+from aiopppp import DeviceDescriptor, Discovery
+from aiopppp.discover import DISCOVERY_PORT
+
+from .const import LOGGER
+
+# Probes sent to a host before giving up on it.
+PROBE_ATTEMPTS = 2
+# Seconds to wait for an answer to a probe.
+PROBE_TIMEOUT = 0.5
+# Seconds between runs of the send loop.
+TICK = 0.01
+
+
+class _SweepProtocol(asyncio.DatagramProtocol):
+    """Passes the answers on the sweep socket to the sweep."""
+
+    def __init__(self, on_receive: Callable[[bytes, tuple[str, int]], None]) -> None:
+        self._on_receive = on_receive
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self._on_receive(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        LOGGER.debug("Sweep socket error: %s", exc)
+
+
+class SubnetSweep:
+    """Sends the LAN search probe by unicast to every host of some networks.
+
+    All probes go out of one socket, at most `rate` hosts per second and to
+    at most `in_flight` hosts waiting for an answer at a time. A host that
+    answers is not probed again, one that does not is retried until it has
+    had `PROBE_ATTEMPTS` probes. A sweep that is cut off remembers where it
+    stopped, and the next one resumes there.
+    """
+
+    def __init__(
+        self, networks: Iterable[IPv4Network], rate: float, in_flight: int
+    ) -> None:
+        """Initialize the sweep."""
+        self._rate = rate
+        self._in_flight = in_flight
+        self._packets = Discovery.get_possible_discovery_packets()
+        self._decoder = Discovery(None)
+        # First host index, first address and host count of each network.
+        # Overlapping networks are merged, so no host is probed twice.
+        self._ranges: list[tuple[int, int, int]] = []
+        self.size = 0
+        for network in collapse_addresses(networks):
+            if network.num_addresses > 2:
+                # Leave out the network and broadcast addresses.
+                first, count = int(network.network_address) + 1, network.num_addresses - 2
+            else:
+                first, count = int(network.network_address), network.num_addresses
+            self._ranges.append((self.size, first, count))
+            self.size += count
+        self._starts = [start for start, _, _ in self._ranges]
+        self._cursor = 0
+
+    async def async_sweep(self, callback: Callable[[DeviceDescriptor], Any]) -> None:
+        """Probe every host once, calling back for each camera that answers."""
+        loop = asyncio.get_running_loop()
+        start = self._cursor
+        # Hosts waiting for an answer, with their index and the probes they had.
+        pending: dict[str, tuple[int, int]] = {}
+        # Probe deadlines in send order, so the earliest is always first.
+        deadlines: deque[tuple[float, str]] = deque()
+        retries: deque[str] = deque()
+        answered: set[str] = set()
+        swept = 0
+
+        def on_device(device: DeviceDescriptor) -> None:
+            if device.addr in answered:
+                return
+            answered.add(device.addr)
+            pending.pop(device.addr, None)
+            callback(device)
+
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _SweepProtocol(
+                lambda data, addr: self._decoder.on_receive(data, addr, on_device)
+            ),
+            local_addr=("0.0.0.0", 0),
+        )
+        hosts = itertools.chain(range(start, self.size), range(start))
+        next_index = start
+        exhausted = False
+        # Sends may catch up on a late tick, but not by more than two ticks.
+        burst = max(1.0, self._rate * TICK * 2)
+        budget = 0.0
+        last = loop.time()
+        try:
+            while True:
+                now = loop.time()
+                while deadlines and deadlines[0][0] <= now:
+                    _, host = deadlines.popleft()
+                    if (probe := pending.get(host)) is None:
+                        continue
+                    if probe[1] < PROBE_ATTEMPTS:
+                        retries.append(host)
+                    else:
+                        del pending[host]
+
+                budget = min(burst, budget + (now - last) * self._rate)
+                last = now
+                while budget >= 1:
+                    if retries:
+                        host = retries.popleft()
+                        if (probe := pending.get(host)) is None:
+                            continue
+                        index, attempts = probe
+                    elif exhausted or len(pending) >= self._in_flight:
+                        break
+                    elif (index := next(hosts, None)) is None:
+                        exhausted = True
+                        break
+                    else:
+                        host, attempts = self._address(index), 0
+                        next_index = index + 1
+                        swept += 1
+                    for packet in self._packets:
+                        transport.sendto(packet, (host, DISCOVERY_PORT))
+                    pending[host] = (index, attempts + 1)
+                    deadlines.append((now + PROBE_TIMEOUT, host))
+                    budget -= 1
+
+                if exhausted and not pending:
+                    return
+                await asyncio.sleep(TICK)
+        finally:
+            transport.close()
+            if not exhausted or pending:
+                # Resume at the earliest host that was not done with.
+                self._cursor = min(
+                    (index for index, _ in pending.values()),
+                    key=lambda index: (index - start) % self.size,
+                    default=next_index,
+                ) % self.size
+                LOGGER.info(
+                    "Sweep stopped with %d of %d hosts done, the next one resumes at %s",
+                    swept - len(pending),
+                    self.size,
+                    self._address(self._cursor),
+                )
+            LOGGER.debug("Swept %d hosts, %d answered", swept, len(answered))
+
+    def _address(self, index: int) -> str:
+        """Return the address of the host with the given index."""
+        start, first, _ = self._ranges[bisect.bisect_right(self._starts, index) - 1]
+        return str(IPv4Address(first + index - start))
@@ -0,0 +1,259 @@
+"""Timelapse capture for PPPP cameras."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import shutil
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import aiopppp
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER
+from .frames import FRAME_TIMEOUT, Frame
+
+if TYPE_CHECKING:
+    from .device import PPPPDevice
+
+FLUSH_FRAMES = 10
+FLUSH_INTERVAL = 300
+ROTATE_INTERVAL = 3600
+
+
+class Timelapse:
+    """Saves one frame every `interval` seconds to date-partitioned folders.
+
+    If the interval is longer than the video linger, each capture takes a
+    snapshot, so video only runs around captures. Otherwise the timelapse
+    keeps the shared video session running and samples its latest frame.
+    Frames are written in batches in the executor, and old captures are
+    removed by age and by total size. The size of each day folder is counted
+    once at start and then as captures are written, so rotation only lists
+    the folders it prunes.
+    """
+
+    def __init__(
+        self,
+        device: PPPPDevice,
+        interval: float,
+        retention_days: int,
+        max_size_mb: int,
+        linger: float,
+    ) -> None:
+        """Initialize the timelapse."""
+        self._device = device
+        self._interval = interval
+        self._retention = timedelta(days=retention_days)
+        self._max_size = max_size_mb * 1024 * 1024
+        self._linger = linger
+        self._pending: list[tuple[str, bytes]] = []
+        # Bytes stored per day folder, None until the folders were scanned.
+        self._usage: dict[str, int] | None = None
+        self._last_flush = self._last_rotate = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def directory(self) -> str:
+        """Return the directory holding this camera's captures."""
+        hass = self._device.hass
+        media_dir = hass.config.media_dirs.get("local", hass.config.path("media"))
+        return os.path.join(media_dir, DOMAIN, self._device.dev_id)
+
+    def start(self) -> None:
+        """Start capturing."""
+        if self._task is None:
+            self._task = self._device.hass.async_create_background_task(
+                self._async_run(), f"pppp_camera {self._device.dev_id} timelapse"
+            )
+
+    async def async_stop(self) -> None:
+        """Stop capturing and write out pending frames."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self._async_flush()
+
+    async def _async_run(self) -> None:
+        await self._async_rotate()
+        self._last_flush = self._last_rotate = time.monotonic()
+        if self._interval > self._linger:
+            await self._async_capture_snapshots()
+        else:
+            await self._async_capture_video()
+
+    async def _async_capture_snapshots(self) -> None:
+        """Take a snapshot every interval, letting video stop in between."""
+        last_seq: int | None = None
+        while True:
+            await asyncio.sleep(self._interval)
+            frame = await self._device.async_get_snapshot()
+            if frame is None or frame.seq == last_seq:
+                LOGGER.debug("Timelapse of %s got no new frame", self._device.host)
+                continue
+            last_seq = frame.seq
+            await self._async_save(frame)
+
+    async def _async_capture_video(self) -> None:
+        """Hold a video consumer and capture while the session is healthy."""
+        video = self._device.video
+        while True:
+            try:
+                await video.async_acquire()
+            except (TimeoutError, aiopppp.NotConnectedError) as err:
+                LOGGER.warning(
+                    "Timelapse of %s cannot start video: %s", self._device.host, err
+                )
+                await asyncio.sleep(self._interval)
+                continue
+            try:
+                await self._async_sample_frames()
+            finally:
+                video.release()
+
+    async def _async_sample_frames(self) -> None:
+        """Capture frames until the video session stops delivering them."""
+        last_capture = time.monotonic()
+        last_seq: int | None = None
+        while True:
+            await asyncio.sleep(self._interval)
+            now = time.monotonic()
+            frame = self._device.frames.latest
+            if frame is None or frame.seq == last_seq:
+                if now - last_capture > self._interval + FRAME_TIMEOUT:
+                    LOGGER.debug(
+                        "Timelapse of %s stopped receiving frames", self._device.host
+                    )
+                    return
+                continue
+
+            last_capture, last_seq = now, frame.seq
+            await self._async_save(frame)
+
+    async def _async_save(self, frame: Frame) -> None:
+        """Queue a capture, flushing and rotating when they are due."""
+        now = time.monotonic()
+        self._pending.append((self._path(), frame.data))
+        if len(self._pending) >= FLUSH_FRAMES or now - self._last_flush >= FLUSH_INTERVAL:
+            await self._async_flush()
+            self._last_flush = now
+        if now - self._last_rotate >= ROTATE_INTERVAL:
+            await self._async_rotate()
+            self._last_rotate = now
+
+    def _path(self) -> str:
+        """Return the file path for a capture taken now."""
+        now = dt_util.now()
+        # Milliseconds keep captures less than a second apart from colliding.
+        return os.path.join(
+            self.directory,
+            now.strftime("%Y-%m-%d"),
+            f"{now:%H-%M-%S}-{now.microsecond // 1000:03d}.jpg",
+        )
+
+    async def _async_flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            await self._device.hass.async_add_executor_job(_write_frames, pending)
+        except OSError as err:
+            LOGGER.error("Error writing timelapse of %s: %s", self._device.host, err)
+            # Some frames may have been written, count them again.
+            self._usage = None
+            return
+        if self._usage is not None:
+            for path, data in pending:
+                day = os.path.basename(os.path.dirname(path))
+                self._usage[day] = self._usage.get(day, 0) + len(data)
+
+    async def _async_rotate(self) -> None:
+        hass = self._device.hass
+        oldest_day = (dt_util.now() - self._retention).strftime("%Y-%m-%d")
+        try:
+            if self._usage is None:
+                self._usage = await hass.async_add_executor_job(
+                    _scan_usage, self.directory
+                )
+            excess = (
+                sum(size for day, size in self._usage.items() if day >= oldest_day)
+                - self._max_size
+            )
+            removed, freed = await hass.async_add_executor_job(
+                _rotate, self.directory, sorted(self._usage), oldest_day, excess
+            )
+        except OSError as err:
+            LOGGER.error("Error rotating timelapse of %s: %s", self._device.host, err)
+            self._usage = None
+            return
+        for day in removed:
+            self._usage.pop(day, None)
+        for day, size in freed.items():
+            if day in self._usage:
+                self._usage[day] -= size
+
+
+def _write_frames(frames: list[tuple[str, bytes]]) -> None:
+    """Write a batch of captures to disk."""
+    for path, data in frames:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+
+
+def _scan_usage(directory: str) -> dict[str, int]:
+    """Return the bytes stored in each day folder."""
+    usage: dict[str, int] = {}
+    if not os.path.isdir(directory):
+        return usage
+    for day in os.listdir(directory):
+        day_dir = os.path.join(directory, day)
+        if not os.path.isdir(day_dir):
+            continue
+        with os.scandir(day_dir) as entries:
+            usage[day] = sum(entry.stat().st_size for entry in entries)
+    return usage
+
+
+def _rotate(
+    directory: str, days: list[str], oldest_day: str, excess: int
+) -> tuple[list[str], dict[str, int]]:
+    """Remove day folders older than `oldest_day`, then the oldest captures
+    until `excess` bytes were freed.
+
+    Only the folders captures are removed from are listed. Returns the
+    removed day folders and the bytes freed in the others.
+    """
+    removed: list[str] = []
+    freed: dict[str, int] = {}
+    for day in days:
+        day_dir = os.path.join(directory, day)
+        if day < oldest_day:
+            shutil.rmtree(day_dir, ignore_errors=True)
+            removed.append(day)
+            continue
+        if excess <= 0:
+            break
+
+        try:
+            with os.scandir(day_dir) as entries:
+                files = sorted(entries, key=lambda entry: entry.name)
+        except FileNotFoundError:
+            removed.append(day)
+            continue
+        for entry in files:
+            if excess <= 0:
+                break
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            excess -= size
+            freed[day] = freed.get(day, 0) + size
+        else:
+            # Fails if a capture was written to the folder in the meantime.
+            with contextlib.suppress(OSError):
+                os.rmdir(day_dir)
+                removed.append(day)
+    return removed, freed
@@ -0,0 +1,139 @@
+"""Video session lifecycle for PPPP cameras."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from .device import PPPPDevice
+
+
+class VideoSession:
+    """Starts video for the first consumer and stops it after the last one leaves.
+
+    Stopping is delayed by `linger` seconds so a viewer that comes back, or the
+    next still request, finds the P2P video session already running. While
+    video is on, `reader` runs as a background task to drain the device's
+    frame queue.
+    """
+
+    def __init__(
+        self,
+        device: PPPPDevice,
+        linger: float,
+        reader: Callable[[], Awaitable[None]],
+    ) -> None:
+        """Initialize the video session."""
+        self._device = device
+        self._linger = linger
+        self._reader = reader
+        self._lock = asyncio.Lock()
+        self._consumers = 0
+        self._active = False
+        self._reader_task: asyncio.Task | None = None
+        self._stop_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def consumers(self) -> int:
+        """Return the number of video consumers."""
+        return self._consumers
+
+    @property
+    def active(self) -> bool:
+        """Return True if video is running."""
+        return self._active
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the session state."""
+        return {
+            "active": self._active,
+            "consumers": self._consumers,
+            "stopping": self._stop_handle is not None,
+        }
+
+    async def async_acquire(self) -> None:
+        """Register a consumer, starting video if it is not running."""
+        self._consumers += 1
+        self._cancel_stop()
+        try:
+            async with self._lock:
+                if self._active and self._reader_task is None:
+                    # The reader stopped on an error, restart the session.
+                    await self._async_stop_video()
+                if not self._active:
+                    await self._async_start_video()
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        """Unregister a consumer, stopping video after the linger period."""
+        self._consumers -= 1
+        if self._consumers == 0 and self._active:
+            self._stop_handle = self._device.hass.loop.call_later(
+                self._linger, self._schedule_stop
+            )
+
+    async def async_stop(self) -> None:
+        """Stop video right away."""
+        self._cancel_stop()
+        async with self._lock:
+            await self._async_stop_video()
+
+    def _cancel_stop(self) -> None:
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+
+    def _schedule_stop(self) -> None:
+        self._stop_handle = None
+        self._device.hass.async_create_task(self._async_stop_idle())
+
+    async def _async_stop_idle(self) -> None:
+        """Stop video unless a consumer arrived in the meantime."""
+        async with self._lock:
+            if self._consumers == 0:
+                await self._async_stop_video()
+
+    async def _async_start_video(self) -> None:
+        device = self._device.device
+        await self._device.connection.async_acquire()
+        try:
+            if not device.is_video_requested:
+                with self._device.instrumentation.timer("start_video"):
+                    await device.start_video()
+        except BaseException:
+            self._device.connection.release()
+            raise
+        self._active = True
+        self._reader_task = self._device.hass.async_create_background_task(
+            self._async_run_reader(), f"pppp_camera {self._device.dev_id} frame reader"
+        )
+        LOGGER.debug("Video started on %s", self._device.host)
+
+    async def _async_stop_video(self) -> None:
+        if not self._active:
+            return
+        self._active = False
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        try:
+            with self._device.instrumentation.timer("stop_video"):
+                await self._device.device.stop_video()
+        except Exception as err:  # noqa: BLE001
+            LOGGER.debug("Error stopping video on %s: %s", self._device.host, err)
+        finally:
+            self._device.connection.release()
+        LOGGER.debug("Video stopped on %s", self._device.host)
+
+    async def _async_run_reader(self) -> None:
+        try:
+            await self._reader()
+        finally:
+            if self._reader_task is asyncio.current_task():
+                self._reader_task = None
@@ -0,0 +1,110 @@
+"""Startup connection scheduling for PPPP cameras."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+from .config_helpers import get_connection_config
+from .const import (
+    CONF_STARTUP_CONCURRENCY,
+    CONF_STARTUP_DEADLINE,
+    DATA_WARMUP,
+    DOMAIN,
+    LOGGER,
+)
+
+if TYPE_CHECKING:
+    from .device import PPPPDevice
+
+
+class WarmupScheduler:
+    """Limits how many cameras make their first connection at the same time.
+
+    When many entries load together, their handshakes would otherwise all hit
+    the network at once and time out. Until a device has connected once, its
+    connection attempts wait for one of `concurrency` slots, devices with video
+    consumers first, and must finish within `deadline` seconds. The time from
+    startup until each device was ready is kept for diagnostics.
+    """
+
+    def __init__(self, hass: HomeAssistant, concurrency: int, deadline: float) -> None:
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._concurrency = concurrency
+        self._deadline = deadline
+        self._started = time.monotonic()
+        self._running = 0
+        self._waiters: list[tuple[PPPPDevice, asyncio.Future[None]]] = []
+        self.ready: dict[str, float] = {}
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the scheduler state."""
+        return {
+            "concurrency": self._concurrency,
+            "deadline": self._deadline,
+            "connecting": self._running,
+            "waiting": len(self._waiters),
+        }
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self, device: PPPPDevice) -> AsyncIterator[None]:
+        """Wrap a connection attempt of a device."""
+        if device.dev_id in self.ready:
+            yield
+            return
+
+        await self._async_acquire(device)
+        try:
+            async with asyncio.timeout(self._deadline):
+                yield
+            self.ready[device.dev_id] = ready = time.monotonic() - self._started
+            LOGGER.info("%s ready %.1f s after startup", device.host, ready)
+        finally:
+            self._release()
+
+    async def _async_acquire(self, device: PPPPDevice) -> None:
+        if self._running < self._concurrency and not self._waiters:
+            self._running += 1
+            return
+
+        waiter = (device, self._hass.loop.create_future())
+        self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            if waiter[1].done() and not waiter[1].cancelled():
+                # The slot was handed over before the cancellation.
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self) -> None:
+        self._running -= 1
+        while self._waiters and self._running < self._concurrency:
+            # max() keeps the first of equal priorities, so ties are FIFO.
+            waiter = max(self._waiters, key=lambda waiter: waiter[0].warmup_priority)
+            self._waiters.remove(waiter)
+            if waiter[1].done():
+                continue
+            self._running += 1
+            waiter[1].set_result(None)
+
+
+def get_warmup_scheduler(hass: HomeAssistant) -> WarmupScheduler:
+    """Get the scheduler shared by all entries."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if (scheduler := data.get(DATA_WARMUP)) is None:
+        config = get_connection_config(hass)
+        scheduler = data[DATA_WARMUP] = WarmupScheduler(
+            hass,
+            config.get(CONF_STARTUP_CONCURRENCY, 4),
+            config.get(CONF_STARTUP_DEADLINE, 30),
+        )
+    return scheduler
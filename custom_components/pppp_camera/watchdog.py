@@ -0,0 +1,139 @@
+"""Availability tracking for PPPP cameras."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import TYPE_CHECKING, Any
+
+import aiopppp
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .const import LOGGER, SIGNAL_AVAILABILITY
+from .discovery import async_request_discovery
+
+if TYPE_CHECKING:
+    from .device import PPPPDevice
+
+
+class Watchdog:
+    """Probes a device periodically and tracks whether it is available.
+
+    While the device has an open session, the session's own keepalives are
+    enough and nothing is sent. Otherwise a unicast LAN search is sent to the
+    device's host, which does not set up a P2P session. After a failed probe
+    the device is marked unavailable and probed again with jittered
+    exponential backoff, so many cameras going down at once do not probe in
+    lockstep.
+    """
+
+    def __init__(
+        self,
+        device: PPPPDevice,
+        interval: float,
+        probe_timeout: float,
+        max_backoff: float,
+    ) -> None:
+        """Initialize the watchdog."""
+        self._device = device
+        self._interval = interval
+        self._probe_timeout = probe_timeout
+        self._max_backoff = max_backoff
+        self._failures = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the watchdog state."""
+        return {
+            "interval": self._interval,
+            "failures": self._failures,
+        }
+
+    def start(self) -> None:
+        """Start probing."""
+        if self._task is None:
+            self._task = self._device.hass.async_create_background_task(
+                self._async_run(), f"pppp_camera {self._device.dev_id} watchdog"
+            )
+
+    def stop(self) -> None:
+        """Stop probing."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self) -> None:
+        """Forget past failures, e.g. after the host changed, and probe now."""
+        self._failures = 0
+        self._set_available(True)
+        self._wakeup.set()
+
+    def report_failure(self) -> None:
+        """Mark the device unavailable after a failed connection attempt."""
+        if self._device.available:
+            self._failures = max(self._failures, 1)
+            self._set_available(False)
+            self._wakeup.set()
+
+    async def _async_run(self) -> None:
+        # Spread the first probes of many devices over the interval.
+        await self._async_sleep(random.uniform(0, self._interval))
+        while True:
+            if await self._async_probe():
+                self._failures = 0
+                self._set_available(True)
+                delay = self._interval
+            else:
+                self._failures += 1
+                self._set_available(False)
+                delay = self._backoff()
+            await self._async_sleep(delay)
+
+    async def _async_probe(self) -> bool:
+        """Return True if the device answers."""
+        if self._device.device.is_connected:
+            return True
+        try:
+            with self._device.instrumentation.timer("probe"):
+                await aiopppp.find_device(
+                    self._device.host, timeout=self._probe_timeout
+                )
+        except TimeoutError:
+            LOGGER.debug("%s did not answer the probe", self._device.host)
+            return False
+        except OSError as err:
+            LOGGER.debug("Error probing %s: %s", self._device.host, err)
+            return False
+        return True
+
+    def _backoff(self) -> float:
+        """Return the delay before the next probe of an unavailable device."""
+        delay = min(self._max_backoff, self._probe_timeout * 2 ** self._failures)
+        return random.uniform(delay / 2, delay)
+
+    async def _async_sleep(self, delay: float) -> None:
+        """Sleep, waking up early on a reported failure or a reset."""
+        self._wakeup.clear()
+        try:
+            async with asyncio.timeout(delay):
+                await self._wakeup.wait()
+        except TimeoutError:
+            pass
+
+    def _set_available(self, available: bool) -> None:
+        if self._device.available == available:
+            return
+        self._device.available = available
+        if available:
+            LOGGER.info("%s is available again", self._device.host)
+        else:
+            LOGGER.warning("%s is unavailable", self._device.host)
+            # The camera may have moved to another address.
+            async_request_discovery(
+                self._device.hass, f"{self._device.host} is unavailable"
+            )
+        async_dispatcher_send(
+            self._device.hass,
+            SIGNAL_AVAILABILITY.format(self._device.config_entry.entry_id),
+        )
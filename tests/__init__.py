@@ -0,0 +1 @@
+"""Tests for the PPPP Camera integration."""
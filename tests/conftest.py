@@ -0,0 +1,11 @@
+"""Fixtures for PPPP Camera tests."""
+
+import pytest
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable loading the integration from custom_components."""
+    yield
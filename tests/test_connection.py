@@ -0,0 +1,179 @@
+"""Tests for the shared P2P connection of a device."""
+
+import asyncio
+import random
+
+import aiopppp
+import pytest
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.pppp_camera.connection import (
+    STATE_CONNECTED,
+    STATE_DISCONNECTED,
+    ConnectionManager,
+)
+from custom_components.pppp_camera.const import DOMAIN
+from custom_components.pppp_camera.device import PPPPDevice
+
+IDLE_TIMEOUT = 0.05
+
+
+class FakeDevice:
+    """Stands in for aiopppp.Device, counting connects and closes."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.connects = 0
+        self.closes = 0
+        self._session: object | None = None
+
+    @property
+    def is_connected(self) -> bool:
+        return bool(self._session)
+
+    async def connect(self) -> None:
+        self.connects += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise TimeoutError
+        self._session = object()
+
+    async def close(self) -> None:
+        self.closes += 1
+        self._session = None
+
+
+@pytest.fixture
+def device(hass: HomeAssistant) -> PPPPDevice:
+    """Return a device with a fake P2P session and a short idle timeout."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="DGOK-123456-ABCDE",
+        options={
+            CONF_HOST: "192.0.2.10",
+            CONF_USERNAME: "admin",
+            CONF_PASSWORD: "6666",
+        },
+    )
+    entry.add_to_hass(hass)
+    device = PPPPDevice(hass, entry)
+    device.device = FakeDevice()
+    device.connection = ConnectionManager(device, IDLE_TIMEOUT)
+    return device
+
+
+async def test_concurrent_users_share_one_connection(
+    hass: HomeAssistant, device: PPPPDevice
+) -> None:
+    """Test that overlapping users connect once and never see a closed session."""
+    closed_for_user = 0
+
+    async def use() -> None:
+        nonlocal closed_for_user
+        await asyncio.sleep(random.uniform(0, 0.02))
+        async with device.connection.async_use():
+            await asyncio.sleep(random.uniform(0, 0.02))
+            if not device.device.is_connected:
+                closed_for_user += 1
+
+    await asyncio.gather(*(use() for _ in range(100)))
+
+    assert device.device.connects == 1
+    assert device.device.closes == 0
+    assert closed_for_user == 0
+    assert device.connection.users == 0
+    assert device.connection.state == STATE_CONNECTED
+
+    await asyncio.sleep(IDLE_TIMEOUT * 2)
+    await hass.async_block_till_done()
+
+    assert device.device.closes == 1
+    assert device.connection.state == STATE_DISCONNECTED
+
+
+async def test_idle_close_after_release(
+    hass: HomeAssistant, device: PPPPDevice
+) -> None:
+    """Test that the session closes after the idle timeout, not before."""
+    async with device.connection.async_use():
+        pass
+    assert device.device.is_connected
+
+    # A user arriving within the idle timeout keeps the session.
+    await asyncio.sleep(IDLE_TIMEOUT / 2)
+    async with device.connection.async_use():
+        pass
+    await asyncio.sleep(IDLE_TIMEOUT / 2)
+    await hass.async_block_till_done()
+    assert device.device.is_connected
+    assert device.device.connects == 1
+
+    await asyncio.sleep(IDLE_TIMEOUT * 2)
+    await hass.async_block_till_done()
+    assert not device.device.is_connected
+    assert device.device.closes == 1
+
+    # The next user connects again.
+    async with device.connection.async_use():
+        assert device.device.is_connected
+    assert device.device.connects == 2
+
+    await device.connection.async_close()
+
+
+async def test_connect_failure_reports_to_watchdog(
+    hass: HomeAssistant, device: PPPPDevice
+) -> None:
+    """Test that a failed connect marks the device unavailable and fails fast."""
+    device.device.fail = True
+
+    with pytest.raises(TimeoutError):
+        await device.connection.async_acquire()
+
+    assert not device.available
+    assert device.connection.users == 0
+    assert device.connection.state == STATE_DISCONNECTED
+
+    # While unavailable, users fail right away without another attempt.
+    with pytest.raises(aiopppp.NotConnectedError):
+        await device.connection.async_acquire()
+    assert device.device.connects == 1
+    assert device.connection.users == 0
+
+    # Once the watchdog sees the device again, connecting works.
+    device.device.fail = False
+    device.watchdog.reset()
+    async with device.connection.async_use():
+        assert device.device.is_connected
+    assert device.available
+
+    await device.connection.async_close()
+
+
+async def test_close_waits_for_users(
+    hass: HomeAssistant, device: PPPPDevice
+) -> None:
+    """Test that closing right away lets the current users finish first."""
+    await device.connection.async_acquire()
+
+    close = hass.async_create_task(device.connection.async_close())
+    await asyncio.sleep(0.01)
+    assert not close.done()
+    assert device.device.closes == 0
+
+    # A user arriving while the close waits gets a new session afterwards.
+    late = hass.async_create_task(device.connection.async_acquire())
+    await asyncio.sleep(0.01)
+    assert not late.done()
+
+    device.connection.release()
+    await close
+    await late
+    assert device.device.closes == 1
+    assert device.device.connects == 2
+    assert device.device.is_connected
+
+    device.connection.release()
+    await device.connection.async_close()
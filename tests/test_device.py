@@ -0,0 +1,54 @@
+"""Tests for the PPPP device."""
+
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.pppp_camera.const import (
+    DOMAIN,
+    STORAGE_KEY,
+    STORAGE_PROPERTIES,
+)
+from custom_components.pppp_camera.device import PPPPDevice, get_store
+
+
+async def test_empty_properties_are_stored(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test that an empty property set is stored, so setup can skip the camera."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="DGOK-123456-ABCDE",
+        options={CONF_HOST: "192.0.2.10"},
+    )
+    entry.add_to_hass(hass)
+    device = PPPPDevice(hass, entry)
+    device._store = get_store(hass, entry.entry_id)
+
+    await device._async_update_info({})
+
+    key = STORAGE_KEY.format(entry.entry_id)
+    assert hass_storage[key]["data"] == {STORAGE_PROPERTIES: {}}
+
+
+async def test_save_clip_without_video(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that a clip without frames reports none and writes no file."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="DGOK-123456-ABCDE",
+        options={CONF_HOST: "192.0.2.10"},
+    )
+    entry.add_to_hass(hass)
+    device = PPPPDevice(hass, entry)
+    device.device = SimpleNamespace(is_connected=False)
+    device.available = False
+    path = tmp_path / "clip.mkv"
+
+    assert await device.async_save_clip(str(path), 0.05) == 0
+    assert not path.exists()
+
+    await device.connection.async_close()
@@ -0,0 +1,104 @@
+"""Tests for the multipart MJPEG writer."""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+from aiohttp.http_writer import StreamWriter
+from aiohttp.test_utils import make_mocked_request
+
+from custom_components.pppp_camera.mjpeg import MjpegStreamWriter
+
+# About the size of a 4K JPEG.
+FRAME = b"\xff\xd8" + bytes(4_000_000) + b"\xff\xd9"
+HEADER = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 4000004\r\n\r\n"
+
+
+class RecordingTransport(asyncio.Transport):
+    """Keeps every chunk handed to it, without copying."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks: list[bytes] = []
+
+    def is_closing(self) -> bool:
+        return False
+
+    def write(self, data: bytes) -> None:
+        self.chunks.append(data)
+
+    def writelines(self, list_of_data) -> None:
+        self.chunks.extend(list_of_data)
+
+
+async def _async_prepared_writer() -> tuple[MjpegStreamWriter, RecordingTransport]:
+    transport = RecordingTransport()
+    protocol = Mock(transport=transport, _paused=False)
+    payload_writer = StreamWriter(protocol, asyncio.get_running_loop())
+    request = make_mocked_request(
+        "GET", "/", writer=payload_writer, protocol=protocol, transport=transport
+    )
+    writer = MjpegStreamWriter(boundary="frame")
+    await writer.prepare(request)
+    transport.chunks.clear()
+    return writer, transport
+
+
+def _copied(chunks: list[bytes], data: bytes) -> int:
+    """Return the bytes handed to the transport that are not `data` itself."""
+    return sum(len(chunk) for chunk in chunks if chunk is not data)
+
+
+async def test_write_frame_bytes() -> None:
+    """Test that each part is framed with its boundary and length."""
+    writer, transport = await _async_prepared_writer()
+
+    await writer.write_frame(FRAME)
+    await writer.write_frame(b"jpeg")
+
+    assert b"".join(transport.chunks) == (
+        HEADER
+        + FRAME
+        + b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 4\r\n\r\njpeg"
+    )
+
+
+async def test_write_frame_does_not_copy_payload() -> None:
+    """Test that the JPEG reaches the transport as the caller's object."""
+    writer, transport = await _async_prepared_writer()
+
+    await writer.write_frame(FRAME)
+
+    assert transport.chunks == [HEADER, FRAME]
+    assert transport.chunks[1] is FRAME
+    assert _copied(transport.chunks, FRAME) == len(HEADER)
+
+
+async def _async_write_joined(writer: MjpegStreamWriter, data: bytes) -> None:
+    """Write a part the way it was written before, as one joined buffer."""
+    await writer.response.write(
+        b"".join((writer._part_prefix, b"%d\r\n\r\n" % len(data), data))
+    )
+
+
+async def test_write_frame_throughput() -> None:
+    """Report frames/sec and bytes copied per frame, joined vs. scatter."""
+    frames = 100
+    results = {}
+    for name, write in (
+        ("joined", _async_write_joined),
+        ("scatter", MjpegStreamWriter.write_frame),
+    ):
+        writer, transport = await _async_prepared_writer()
+        start = time.perf_counter()
+        for _ in range(frames):
+            await write(writer, FRAME)
+        elapsed = time.perf_counter() - start
+        copied = _copied(transport.chunks, FRAME)
+        results[name] = (frames / elapsed, copied / frames)
+
+    print(f"\n{len(FRAME)} byte frames:")
+    for name, (fps, copied) in results.items():
+        print(f"  {name}: {fps:.0f} frames/s, {copied:.0f} bytes copied/frame")
+    assert results["joined"][1] == len(HEADER) + len(FRAME)
+    assert results["scatter"][1] == len(HEADER)
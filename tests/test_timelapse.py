@@ -0,0 +1,58 @@
+"""Tests for the timelapse capture."""
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.pppp_camera import timelapse
+from custom_components.pppp_camera.timelapse import Timelapse
+
+
+async def test_rotation_tracks_usage(
+    hass: HomeAssistant, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that rotation keeps the size limit without rescanning the folders."""
+    hass.config.media_dirs = {"local": str(tmp_path)}
+    device = SimpleNamespace(hass=hass, dev_id="DGOK-123456-ABCDE", host="camera")
+    lapse = Timelapse(device, 60, 30, 1, 10)
+    lapse._max_size = 1000
+
+    today = dt_util.now().strftime("%Y-%m-%d")
+    for day in ("2000-01-01", today):
+        os.makedirs(os.path.join(lapse.directory, day))
+        for index in range(4):
+            path = os.path.join(lapse.directory, day, f"00-00-0{index}-000.jpg")
+            Path(path).write_bytes(bytes(100))
+
+    await lapse._async_rotate()
+    assert lapse._usage == {today: 400}
+    assert os.listdir(lapse.directory) == [today]
+
+    scans = 0
+    scan_usage = timelapse._scan_usage
+
+    def counting_scan(directory: str) -> dict[str, int]:
+        nonlocal scans
+        scans += 1
+        return scan_usage(directory)
+
+    monkeypatch.setattr(timelapse, "_scan_usage", counting_scan)
+    data = bytes(100)
+    lapse._pending = [
+        (os.path.join(lapse.directory, today, f"12-00-00-{index:03d}.jpg"), data)
+        for index in range(9)
+    ]
+    await lapse._async_flush()
+    assert lapse._usage == {today: 1300}
+
+    # The three oldest captures go, without the folders being scanned again.
+    await lapse._async_rotate()
+    assert scans == 0
+    assert lapse._usage == {today: 1000}
+    files = sorted(os.listdir(os.path.join(lapse.directory, today)))
+    assert files[0] == "00-00-03-000.jpg"
+    assert scan_usage(lapse.directory) == lapse._usage